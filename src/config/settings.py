@@ -1,5 +1,6 @@
 """Application configuration using pydantic-settings."""
 
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from typing import Optional
@@ -15,10 +16,12 @@ class Settings(BaseSettings):
     openai_api_key: str = Field(..., env="OPENAI_API_KEY")
     openai_model: str = Field("gpt-4o", env="OPENAI_MODEL")
     openai_temperature: float = Field(0.3, env="OPENAI_TEMPERATURE")
+    analysis_light_model: Optional[str] = Field("gpt-4o-mini", env="ANALYSIS_LIGHT_MODEL")  # Model for light content analyses; empty uses OPENAI_MODEL
 
     # Execution Configuration
     max_execution_timeout: int = Field(30, env="MAX_EXECUTION_TIMEOUT")
     max_output_size: int = Field(1048576, env="MAX_OUTPUT_SIZE")  # 1MB
+    persistent_powershell: bool = Field(False, env="PERSISTENT_POWERSHELL")  # Reuse one PowerShell process across commands
 
     # Retry Configuration
     max_retries: int = Field(3, env="MAX_RETRIES")
@@ -51,7 +54,7 @@ class Settings(BaseSettings):
     # Conversation Memory Configuration
     enable_conversation_memory: bool = Field(True, env="ENABLE_CONVERSATION_MEMORY")
     max_conversations_in_memory: int = Field(5, env="MAX_CONVERSATIONS_IN_MEMORY")
-    memory_storage_file: Optional[str] = Field(None, env="MEMORY_STORAGE_FILE")  # Default: ~/.claude/langgraph_powershell/conversation_memory.json
+    memory_storage_file: Optional[str] = Field(None, env="MEMORY_STORAGE_FILE")  # Default: ~/.claude/langgraph_powershell/conversation_memory.jsonl
     include_context_in_prompt: bool = Field(True, env="INCLUDE_CONTEXT_IN_PROMPT")  # Include conversation history in LLM prompts
     context_conversations_count: int = Field(3, env="CONTEXT_CONVERSATIONS_COUNT")  # Number of recent conversations to include as context
 
@@ -61,5 +64,11 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the application settings, loading them on first use.
+
+    The instance is cached so .env parsing and validation happen only once.
+    """
+    return Settings()
@@ -1,6 +1,6 @@
 """Conditional edge routing logic for the workflow graph."""
 
-from typing import Literal
+from typing import List, Literal, Union
 from graph.state import CommandState
 import logging
 
@@ -19,10 +19,12 @@ def route_after_confirmation(
     - If rejected without feedback or blocked: end
     """
 
-    if state.get("user_confirmed"):
+    confirmed, feedback = state.get("user_confirmed"), state.get("user_feedback")
+
+    if confirmed:
         logger.debug("Routing to execute_command (user confirmed)")
         return "execute_command"
-    elif state.get("user_feedback"):
+    elif feedback:
         logger.debug("Routing to retry_node (user provided feedback)")
         return "retry_node"
     else:
@@ -32,20 +34,24 @@ def route_after_confirmation(
 
 def route_after_execution(
     state: CommandState
-) -> Literal["validate_result", "present_result", "try_alternative_shell", "intelligent_retry"]:
+) -> Union[
+    Literal["validate_result", "present_result", "try_alternative_shell", "intelligent_retry"],
+    List[Literal["validate_result", "analyze_content"]]
+]:
     """
     Route based on execution status.
 
     Logic:
     - next_step is "intelligent_retry": analyze failure and retry with corrected command
     - next_step is "try_alternative": try alternative shell
-    - Success or Failed: validate results
+    - Success or Failed: validate results, and analyze content in parallel
+      when the request asked for analysis
     - Error: skip validation and go to presentation
     """
 
-    # Check next_step for explicit routing
-    next_step = state.get("next_step")
+    next_step, status = state.get("next_step"), state.get("execution_status")
 
+    # Check next_step for explicit routing
     if next_step == "intelligent_retry":
         logger.debug("Routing to intelligent_retry (will analyze and fix failure)")
         return "intelligent_retry"
@@ -55,13 +61,16 @@ def route_after_execution(
         return "try_alternative_shell"
 
     # Check execution status
-    status = state.get("execution_status")
-
-    if status in ["success", "failed"]:
-        logger.debug(f"Routing to validate_result (status: {status})")
+    if status in ("success", "failed"):
+        if state.get("requires_analysis"):
+            # Analysis does not depend on the validation outcome, so both
+            # LLM calls run in the same step
+            logger.debug("Routing to validate_result and analyze_content (status: %s)", status)
+            return ["validate_result", "analyze_content"]
+        logger.debug("Routing to validate_result (status: %s)", status)
         return "validate_result"
     else:
-        logger.debug(f"Routing to present_result (status: {status}, skipping validation)")
+        logger.debug("Routing to present_result (status: %s, skipping validation)", status)
         return "present_result"
 
 
@@ -76,12 +85,11 @@ def route_after_retry(
     - If max retries exceeded: end
     """
 
-    retry_count = state.get("retry_count", 0)
-    max_retries = state.get("max_retries", 3)
+    retry_count, max_retries = state.get("retry_count", 0), state.get("max_retries", 3)
 
     if retry_count < max_retries:
-        logger.debug(f"Routing to generate_command (retry {retry_count}/{max_retries})")
+        logger.debug("Routing to generate_command (retry %d/%d)", retry_count, max_retries)
         return "generate_command"
     else:
-        logger.debug(f"Routing to end (max retries {max_retries} exceeded)")
+        logger.debug("Routing to end (max retries %d exceeded)", max_retries)
         return "end"
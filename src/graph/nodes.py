@@ -1,55 +1,222 @@
 """Graph node implementations for the PowerShell command workflow."""
 
 from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, NamedTuple, Optional, Tuple, FrozenSet
 import logging
 
 from graph.state import CommandState
 from tools.command_generator import CommandGenerator
 from tools.command_executor import PowerShellExecutor
 from tools.result_validator import ResultValidator
-from tools.content_analyzer import ContentAnalyzer
+from tools.content_analyzer import ContentAnalyzer, LIGHT_ANALYSIS_KINDS, MAX_FILE_CHARS
 from tools.file_reader import FileReader
 from tools.failure_analyzer import FailureAnalyzer
 from security.command_filter import CommandFilter
-from config.settings import settings
+from utils.result_cache import ResultCache, hash_key
+from config.settings import get_settings
 from langgraph.types import interrupt
 import os
+import re
+import stat
 
 logger = logging.getLogger(__name__)
 
-# Initialize tools
-command_generator = CommandGenerator(
-    api_key=settings.openai_api_key,
-    model=settings.openai_model,
-    temperature=settings.openai_temperature
+# Intent detection keywords. Single words are stems matched against the
+# start of each input token, so inflected forms ("cloned", "reading",
+# "analyzing") count too; multi-word phrases are matched against the
+# lowercased input.
+_WORD_RE = re.compile(r"\w+")
+_ANALYSIS_STEMS = ("explain", "analyz", "understand", "summariz", "review", "describ")
+_ANALYSIS_PHRASES = ("check what", "what is the purpose", "tell me about")
+_FILE_OP_STEMS = ("read", "checkout", "clon", "download", "cat", "type")
+
+# Analysis type rules as (type, stems, phrases); the first match wins
+_TYPE_RULES = (
+    ("purpose", ("purpose",), ("what is",)),
+    ("security", ("secur", "vulnerab"), ()),
+    ("explain", ("explain", "understand"), ()),
 )
 
-command_executor = PowerShellExecutor(
-    timeout=settings.max_execution_timeout,
-    max_output_size=settings.max_output_size
-)
+# Prefix of command output that identifies it for result caching
+_CACHE_KEY_OUTPUT_CHARS = 4096
 
-result_validator = ResultValidator(
-    api_key=settings.openai_api_key,
-    model=settings.openai_model
-)
+# Fallback order for alternative shells
+_SHELL_ORDER = ("powershell", "cmd", "bash")
 
-content_analyzer = ContentAnalyzer(
-    api_key=settings.openai_api_key,
-    model=settings.openai_model,
-    temperature=settings.openai_temperature
-)
+# Content extraction patterns. _PATH_RE matches Windows paths (C:\path\file.txt)
+# or relative paths (file.txt, script.py, etc.) in a single pass.
+_PATH_RE = re.compile(r'[A-Za-z]:\\\S+|\S+\.[a-z]{2,4}')
+_CLONE_RE = re.compile(r"Cloning into '([^']+)'")
 
-file_reader = FileReader(max_file_size=10 * 1024 * 1024)  # 10MB max
 
-failure_analyzer = FailureAnalyzer(
-    api_key=settings.openai_api_key,
-    model=settings.openai_model,
-    temperature=settings.openai_temperature
-)
+class _Tools(NamedTuple):
+    """Tool instances shared by all graph nodes."""
+
+    command_generator: CommandGenerator
+    command_executor: PowerShellExecutor
+    result_validator: ResultValidator
+    content_analyzer: ContentAnalyzer
+    file_reader: FileReader
+    failure_analyzer: FailureAnalyzer
+    command_filter: CommandFilter
+
+
+@lru_cache(maxsize=1)
+def _build_tools() -> _Tools:
+    """
+    Construct the tools on first use instead of at import time.
+
+    Returns:
+        Cached tool instances configured from settings
+    """
+    settings = get_settings()
+
+    return _Tools(
+        command_generator=CommandGenerator(
+            api_key=settings.openai_api_key,
+            model=settings.openai_model,
+            temperature=settings.openai_temperature
+        ),
+        command_executor=PowerShellExecutor(
+            timeout=settings.max_execution_timeout,
+            max_output_size=settings.max_output_size,
+            persistent=settings.persistent_powershell
+        ),
+        result_validator=ResultValidator(
+            api_key=settings.openai_api_key,
+            model=settings.openai_model
+        ),
+        content_analyzer=ContentAnalyzer(
+            api_key=settings.openai_api_key,
+            model=settings.openai_model,
+            temperature=settings.openai_temperature,
+            model_map=dict.fromkeys(LIGHT_ANALYSIS_KINDS, settings.analysis_light_model)
+            if settings.analysis_light_model else None
+        ),
+        file_reader=FileReader(max_file_size=10 * 1024 * 1024),  # 10MB max
+        failure_analyzer=FailureAnalyzer(
+            api_key=settings.openai_api_key,
+            model=settings.openai_model,
+            temperature=settings.openai_temperature
+        ),
+        command_filter=CommandFilter()
+    )
+
+
+async def close_tools() -> None:
+    """Shut down the tools' long-lived resources, if the tools were built."""
+    if _build_tools.cache_info().currsize:
+        await _build_tools().command_executor.close()
+
+
+def _output_key_part(execution_result: Optional[Dict[str, Any]]) -> Tuple[Any, ...]:
+    """
+    Summarize an execution result for a cache key.
+
+    Only a prefix of stdout/stderr is hashed; the full lengths are included so
+    outputs that differ only past the prefix rarely collide.
+    """
+    result = execution_result or {}
+    stdout = result.get("stdout") or ""
+    stderr = result.get("stderr") or ""
+    return (
+        result.get("return_code"),
+        len(stdout), stdout[:_CACHE_KEY_OUTPUT_CHARS],
+        len(stderr), stderr[:_CACHE_KEY_OUTPUT_CHARS]
+    )
 
-command_filter = CommandFilter()
+
+# Generated commands keyed by normalized request; see _generation_cache_key()
+_generation_cache = ResultCache(maxsize=256)
+
+# Validation results keyed by their LLM inputs
+_validation_cache = ResultCache(maxsize=256, ttl=3600)
+
+
+@lru_cache(maxsize=1024)
+def _cached_assess(command: str) -> Dict[str, Any]:
+    """Memoized CommandFilter.assess(); callers must not mutate the result."""
+    return _build_tools().command_filter.assess(command)
+
+
+def _assess_command(command: str) -> Dict[str, Any]:
+    """
+    Assess command safety, reusing earlier results for identical commands.
+
+    Returns:
+        A copy of the cached assessment that is safe to modify
+    """
+    assessment = _cached_assess(command)
+    return {
+        **assessment,
+        "matched_patterns": list(assessment["matched_patterns"]),
+        "warnings": list(assessment["warnings"])
+    }
+
+
+@lru_cache(maxsize=512)
+def _is_regular_file(path: str) -> bool:
+    """
+    Check whether path is an existing regular file with a single stat call.
+
+    Results are cached; the cache is cleared whenever a command is executed,
+    since commands may create or remove files.
+    """
+    try:
+        return stat.S_ISREG(os.stat(path).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
+def _generation_cache_key(user_input: str, context: Dict[str, Any]) -> str:
+    """
+    Build the generation cache key for a request.
+
+    The input is case- and whitespace-normalized so trivial variants share an
+    entry. Feedback and retry count are part of the key, so rejecting a cached
+    command always produces a fresh generation. The conversation history is
+    part of it too, since follow-ups like "delete it" depend on earlier turns.
+    """
+    normalized = " ".join(user_input.lower().split())
+    history = hash_key(*(
+        f"{message.get('role', '')}:{message.get('content', '')}"
+        for message in context.get("conversation_messages") or ()
+    ))
+    return hash_key(normalized, context.get("previous_feedback") or "", context.get("retry_count", 0), history)
+
+
+def _has_stem(tokens: FrozenSet[str], stems: Tuple[str, ...]) -> bool:
+    """Check whether any token starts with one of the stems."""
+    return any(token.startswith(stems) for token in tokens)
+
+
+def _classify_intent(lower_input: str, tokens: FrozenSet[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Detect whether the user wants content analysis, and of which type.
+
+    Args:
+        lower_input: Lowercased user input
+        tokens: Word tokens of lower_input
+
+    Returns:
+        Tuple of (requires_analysis, analysis_type); analysis_type is None
+        when no analysis is requested
+    """
+    # User must want to read a file AND analyze it
+    wants_analysis = _has_stem(tokens, _ANALYSIS_STEMS) or any(
+        phrase in lower_input for phrase in _ANALYSIS_PHRASES
+    )
+    if not (wants_analysis and _has_stem(tokens, _FILE_OP_STEMS)):
+        return False, None
+
+    logger.info("Detected analysis request in user input")
+
+    for rule_type, stems, phrases in _TYPE_RULES:
+        if _has_stem(tokens, stems) or any(phrase in lower_input for phrase in phrases):
+            return True, rule_type
+
+    return True, "general"
 
 
 async def generate_command_node(state: CommandState) -> Dict[str, Any]:
@@ -68,35 +235,15 @@ async def generate_command_node(state: CommandState) -> Dict[str, Any]:
 
     logger.info("Node: generate_command")
 
+    tools = _build_tools()
+
     try:
         user_input = state["user_input"]
 
-        # Detect analysis intent from user input
-        analysis_keywords = [
-            "explain", "analyze", "check what", "what is the purpose",
-            "understand", "summarize", "review", "describe", "tell me about"
-        ]
-
-        file_operation_keywords = ["read", "checkout", "clone", "download", "cat", "type"]
-
-        requires_analysis = False
-        analysis_type = "general"
-
         lower_input = user_input.lower()
-
-        # Check if user wants to read file AND analyze it
-        if any(keyword in lower_input for keyword in analysis_keywords):
-            if any(op in lower_input for op in file_operation_keywords):
-                requires_analysis = True
-                logger.info("Detected analysis request in user input")
-
-                # Determine analysis type
-                if "purpose" in lower_input or "what is" in lower_input:
-                    analysis_type = "purpose"
-                elif "security" in lower_input or "vulnerab" in lower_input:
-                    analysis_type = "security"
-                elif "explain" in lower_input or "understand" in lower_input:
-                    analysis_type = "explain"
+        requires_analysis, analysis_type = _classify_intent(
+            lower_input, frozenset(_WORD_RE.findall(lower_input))
+        )
 
         # Prepare context for generation
         context = {}
@@ -105,19 +252,29 @@ async def generate_command_node(state: CommandState) -> Dict[str, Any]:
         if state.get("retry_count", 0) > 0:
             context["retry_count"] = state["retry_count"]
 
-        # Add conversation history if available
+        # Add conversation history if available, bounded to the configured
+        # number of conversations (one user + one assistant message each)
         if state.get("conversation_messages"):
-            context["conversation_messages"] = state["conversation_messages"]
-            logger.debug(f"Including {len(state['conversation_messages'])} conversation messages in context")
-
-        # Generate command
-        generation_result = await command_generator.generate(
-            user_input=user_input,
-            context=context
-        )
+            max_messages = 2 * get_settings().context_conversations_count
+            conversation_messages = state["conversation_messages"][-max_messages:] if max_messages else []
+            context["conversation_messages"] = conversation_messages
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Including %d conversation messages in context", len(conversation_messages))
+
+        # Generate command, reusing an earlier result for a repeated request
+        cache_key = _generation_cache_key(user_input, context)
+        generation_result = _generation_cache.get(cache_key)
+        if generation_result is not None:
+            logger.info("Reusing cached command for repeated request")
+        else:
+            generation_result = await tools.command_generator.generate(
+                user_input=user_input,
+                context=context
+            )
+            _generation_cache.put(cache_key, generation_result)
 
         # Assess safety
-        safety_assessment = command_filter.assess(generation_result["command"])
+        safety_assessment = _assess_command(generation_result["command"])
 
         # Combine warnings from LLM and filter
         all_warnings = (
@@ -138,9 +295,9 @@ async def generate_command_node(state: CommandState) -> Dict[str, Any]:
             "command_explanation": generation_result["explanation"],
             "safety_assessment": combined_assessment,
             "requires_analysis": requires_analysis,
-            "analysis_type": analysis_type if requires_analysis else None,
+            "analysis_type": analysis_type,
             "next_step": "confirm",
-            "messages": state.get("messages", []) + [{
+            "messages": [{
                 "role": "assistant",
                 "content": f"Generated command: {generation_result['command']}",
                 "timestamp": datetime.now().isoformat()
@@ -168,11 +325,11 @@ async def await_confirmation_node(state: CommandState) -> Dict[str, Any]:
 
     # Check if we're resuming after interrupt (user already confirmed)
     if state.get("user_confirmed") is not None:
-        logger.info(f"Resuming after user confirmation: {state['user_confirmed']}")
+        logger.info("Resuming after user confirmation: %s", state["user_confirmed"])
         # Already confirmed, just pass through
         # Return minimal update (LangGraph requires at least one field update)
         return {
-            "confirmation_timestamp": state.get("confirmation_timestamp", datetime.now())
+            "confirmation_timestamp": state.get("confirmation_timestamp") or datetime.now()
         }
 
     # Check if command was blocked by safety filter
@@ -220,39 +377,51 @@ async def execute_command_node(state: CommandState) -> Dict[str, Any]:
 
     logger.info("Node: execute_command")
 
+    tools = _build_tools()
+    settings = get_settings()
+
+    # The command may touch the filesystem, so drop cached file probes
+    _is_regular_file.cache_clear()
+
     # Determine which shell to use (default to PowerShell)
     shell_type = state.get("shell_type", "powershell")
+    timeout = settings.max_execution_timeout
 
     try:
         # Execute based on shell type
         if shell_type == "cmd":
-            result = await command_executor.execute_cmd(
+            result = await tools.command_executor.execute_cmd(
                 command=state["generated_command"],
-                timeout=settings.max_execution_timeout
+                timeout=timeout
             )
         elif shell_type == "bash":
-            result = await command_executor.execute_bash(
+            result = await tools.command_executor.execute_bash(
                 command=state["generated_command"],
-                timeout=settings.max_execution_timeout
+                timeout=timeout
             )
         else:  # default to PowerShell
-            result = await command_executor.execute(
+            result = await tools.command_executor.execute(
                 command=state["generated_command"],
-                timeout=settings.max_execution_timeout
+                timeout=timeout
             )
 
+        now = datetime.now()
+        now_iso = now.isoformat()
+
         # Check if execution failed or had errors
-        has_error = result.get("error") or result.get("return_code", 0) != 0
-        status = "success" if result["return_code"] == 0 else "failed"
+        return_code = result.get("return_code", 0)
+        status = "success" if return_code == 0 else "failed"
+        has_error = return_code != 0 or bool(result.get("error"))
 
-        logger.info(f"Execution {status}: return_code={result['return_code']}, shell={shell_type}")
+        logger.info("Execution %s: return_code=%s, shell=%s", status, return_code, shell_type)
 
         # If succeeded, proceed to validation
         if not has_error:
             return {
                 "execution_status": status,
                 "execution_result": result,
-                "execution_timestamp": datetime.now(),
+                "execution_timestamp": now,
+                "execution_timestamp_iso": now_iso,
                 "attempted_shells": [shell_type],
                 "next_step": "validate"
             }
@@ -272,11 +441,12 @@ async def execute_command_node(state: CommandState) -> Dict[str, Any]:
 
         # Check if we should try intelligent auto-retry
         if settings.enable_auto_retry and auto_retry_count < max_auto_retries:
-            logger.info(f"Execution failed, will attempt intelligent retry ({auto_retry_count + 1}/{max_auto_retries})")
+            logger.info("Execution failed, will attempt intelligent retry (%d/%d)", auto_retry_count + 1, max_auto_retries)
             return {
                 "execution_status": status,
                 "execution_result": result,
-                "execution_timestamp": datetime.now(),
+                "execution_timestamp": now,
+                "execution_timestamp_iso": now_iso,
                 "attempted_shells": [shell_type],
                 "failed_attempts": [failed_attempt],
                 "next_step": "intelligent_retry"
@@ -284,11 +454,12 @@ async def execute_command_node(state: CommandState) -> Dict[str, Any]:
 
         # If auto-retries exhausted, try alternative shell
         if shell_type not in attempted_shells:
-            logger.info(f"Auto-retries exhausted, will try alternative shell")
+            logger.info("Auto-retries exhausted, will try alternative shell")
             return {
                 "execution_status": status,
                 "execution_result": result,
-                "execution_timestamp": datetime.now(),
+                "execution_timestamp": now,
+                "execution_timestamp_iso": now_iso,
                 "attempted_shells": [shell_type],
                 "failed_attempts": [failed_attempt],
                 "next_step": "try_alternative"
@@ -299,7 +470,8 @@ async def execute_command_node(state: CommandState) -> Dict[str, Any]:
         return {
             "execution_status": status,
             "execution_result": result,
-            "execution_timestamp": datetime.now(),
+            "execution_timestamp": now,
+            "execution_timestamp_iso": now_iso,
             "attempted_shells": [shell_type],
             "failed_attempts": [failed_attempt],
             "next_step": "validate"
@@ -307,18 +479,21 @@ async def execute_command_node(state: CommandState) -> Dict[str, Any]:
 
     except Exception as e:
         logger.error(f"Command execution failed: {e}")
+        now = datetime.now()
+        now_iso = now.isoformat()
 
         # Try alternative shell if we haven't yet
         attempted_shells = state.get("attempted_shells", [])
         shell_type = state.get("shell_type", "powershell")
 
         if shell_type not in attempted_shells:
-            logger.info(f"Execution error with {shell_type}, will try alternative shell")
+            logger.info("Execution error with %s, will try alternative shell", shell_type)
             return {
                 "execution_status": "error",
                 "error_message": str(e),
                 "error_type": "execution_error",
-                "execution_timestamp": datetime.now(),
+                "execution_timestamp": now,
+                "execution_timestamp_iso": now_iso,
                 "attempted_shells": [shell_type],
                 "next_step": "try_alternative"
             }
@@ -327,7 +502,8 @@ async def execute_command_node(state: CommandState) -> Dict[str, Any]:
             "execution_status": "error",
             "error_message": str(e),
             "error_type": "execution_error",
-            "execution_timestamp": datetime.now(),
+            "execution_timestamp": now,
+            "execution_timestamp_iso": now_iso,
             "next_step": "present"  # Skip validation on error
         }
 
@@ -344,14 +520,27 @@ async def validate_result_node(state: CommandState) -> Dict[str, Any]:
 
     logger.info("Node: validate_result")
 
+    tools = _build_tools()
+
     try:
-        validation = await result_validator.validate(
-            user_intent=state["user_input"],
-            command=state["generated_command"],
-            execution_result=state["execution_result"]
+        # Identical intent, command and output always validate the same way
+        cache_key = hash_key(
+            state["user_input"],
+            state["generated_command"],
+            *_output_key_part(state["execution_result"])
         )
+        validation = _validation_cache.get(cache_key)
+        if validation is not None:
+            logger.info("Reusing cached validation")
+        else:
+            validation = await tools.result_validator.validate(
+                user_intent=state["user_input"],
+                command=state["generated_command"],
+                execution_result=state["execution_result"]
+            )
+            _validation_cache.put(cache_key, validation)
 
-        logger.info(f"Validation: passed={validation['passed']}")
+        logger.info("Validation: passed=%s", validation["passed"])
 
         return {
             "validation_passed": validation["passed"],
@@ -383,7 +572,7 @@ async def present_result_node(state: CommandState) -> Dict[str, Any]:
 
     # Add to execution history
     history_entry = {
-        "timestamp": state["execution_timestamp"].isoformat() if state.get("execution_timestamp") else None,
+        "timestamp": state.get("execution_timestamp_iso"),
         "user_input": state["user_input"],
         "command": state.get("generated_command"),
         "result": state.get("execution_result"),
@@ -393,7 +582,7 @@ async def present_result_node(state: CommandState) -> Dict[str, Any]:
 
     return {
         "next_step": "end",
-        "execution_history": state.get("execution_history", []) + [history_entry]
+        "execution_history": [history_entry]
     }
 
 
@@ -405,16 +594,17 @@ async def retry_node(state: CommandState) -> Dict[str, Any]:
     logger.info("Node: retry")
 
     retry_count = state.get("retry_count", 0) + 1
+    max_retries = state.get("max_retries", get_settings().max_retries)
 
-    if retry_count >= state.get("max_retries", settings.max_retries):
-        logger.warning(f"Maximum retries ({state['max_retries']}) exceeded")
+    if retry_count >= max_retries:
+        logger.warning("Maximum retries (%d) exceeded", max_retries)
         return {
             "next_step": "end",
             "error_message": "Maximum retries exceeded",
             "retry_count": retry_count
         }
 
-    logger.info(f"Retry attempt {retry_count}/{state.get('max_retries', settings.max_retries)}")
+    logger.info("Retry attempt %d/%d", retry_count, max_retries)
 
     # User feedback will be included in context for next generation
     return {
@@ -423,6 +613,131 @@ async def retry_node(state: CommandState) -> Dict[str, Any]:
     }
 
 
+@lru_cache(maxsize=128)
+def _extract_candidate_paths(user_input: str) -> Tuple[str, ...]:
+    """Extract potential file paths from user input."""
+    return tuple(_PATH_RE.findall(user_input))
+
+
+async def _analyze_file_content(
+    state: CommandState,
+    tools: _Tools,
+    content: str,
+    analysis_target: Optional[str]
+) -> Dict[str, Any]:
+    """Run file analysis on extracted content and build the state update."""
+    analysis_type = state.get("analysis_type", "general")
+    logger.info("Analyzing %s: %s", analysis_type, analysis_target)
+
+    # Keep only the prefix the analyzer uses so the full file buffer
+    # (up to 10MB) is released before waiting on the LLM
+    content = content[:MAX_FILE_CHARS]
+
+    analysis_result = await tools.content_analyzer.analyze_file(
+        file_path=analysis_target or "content",
+        content=content,
+        analysis_type=analysis_type
+    )
+
+    return {
+        "analysis_result": analysis_result,
+        "analysis_target": analysis_target,
+        "content_to_analyze": content[:1000],  # Store sample
+        "next_step": "present"
+    }
+
+
+async def _try_output_as_file(state: CommandState, tools: _Tools) -> Optional[Dict[str, Any]]:
+    """Option 1a: command output is short and names a file; analyze that file."""
+    output = (state.get("execution_result") or {}).get("stdout", "")
+    if not output or len(output) >= 500:
+        return None
+
+    file_content_result = await tools.file_reader.read_file_from_command_output(output)
+    if not file_content_result:
+        return None
+
+    content = file_content_result.pop("content")
+    if not content:
+        return None
+
+    analysis_target = file_content_result["file_path"]
+    logger.info("Reading file from output: %s", analysis_target)
+    return await _analyze_file_content(state, tools, content, analysis_target)
+
+
+async def _analyze_direct(state: CommandState, tools: _Tools) -> Optional[Dict[str, Any]]:
+    """Option 1b: analyze the command output itself."""
+    output = (state.get("execution_result") or {}).get("stdout", "")
+    if not output:
+        return None
+
+    analysis_result = await tools.content_analyzer.analyze_command_output(
+        command=state["generated_command"],
+        output=output,
+        user_intent=state["user_input"]
+    )
+    return {
+        "analysis_result": analysis_result,
+        "next_step": "present"
+    }
+
+
+async def _try_paths_from_input(state: CommandState, tools: _Tools) -> Optional[Dict[str, Any]]:
+    """Option 2: read a file path mentioned in the user input."""
+    for path in _extract_candidate_paths(state["user_input"]):
+        if _is_regular_file(path):
+            file_result = await tools.file_reader.read_file(path)
+            content = file_result.pop("content")
+            if not content:
+                return None
+            return await _analyze_file_content(state, tools, content, path)
+
+    return None
+
+
+async def _try_repo_from_clone(state: CommandState, tools: _Tools) -> Optional[Dict[str, Any]]:
+    """Option 3: analyze a repository the command cloned or checked out."""
+    if not state.get("execution_result"):
+        return None
+
+    stdout = state["execution_result"].get("stdout", "")
+    # Check for git clone output
+    if "Cloning into" not in stdout and "checkout" not in state["generated_command"].lower():
+        return None
+
+    # Try to find the repo directory
+    clone_match = _CLONE_RE.search(stdout)
+    if not clone_match:
+        return None
+
+    repo_path = clone_match.group(1)
+    if not os.path.exists(repo_path):
+        return None
+
+    repo_info = await tools.file_reader.get_repository_structure(repo_path)
+    analysis_result = await tools.content_analyzer.analyze_code_repository(
+        repo_path=repo_path,
+        file_list=repo_info["file_list"],
+        readme_content=repo_info.get("readme_content")
+    )
+    return {
+        "analysis_result": analysis_result,
+        "analysis_target": repo_path,
+        "next_step": "present"
+    }
+
+
+# Content sources for analyze_content_node, tried in order; the first
+# handler returning a state update wins
+_ANALYSIS_HANDLERS = (
+    _try_output_as_file,
+    _analyze_direct,
+    _try_paths_from_input,
+    _try_repo_from_clone,
+)
+
+
 async def analyze_content_node(state: CommandState) -> Dict[str, Any]:
     """
     Analyze content using LLM (files, code, command output).
@@ -437,99 +752,13 @@ async def analyze_content_node(state: CommandState) -> Dict[str, Any]:
 
     logger.info("Node: analyze_content")
 
-    try:
-        analysis_type = state.get("analysis_type", "general")
-        user_input = state["user_input"]
-
-        # Determine what to analyze
-        content_to_analyze = None
-        analysis_target = None
-
-        # Option 1: Analyze command output
-        if state.get("execution_result"):
-            execution_result = state["execution_result"]
-            output = execution_result.get("stdout", "")
-
-            # Check if output contains file path that we should read
-            if output and len(output) < 500:
-                # Might be a file path, try to read it
-                file_content_result = await file_reader.read_file_from_command_output(output)
-                if file_content_result:
-                    content_to_analyze = file_content_result["content"]
-                    analysis_target = file_content_result["file_path"]
-                    logger.info(f"Reading file from output: {analysis_target}")
-
-            # If no file found in output, analyze the output itself
-            if not content_to_analyze and output:
-                # Analyze the command output
-                analysis_result = await content_analyzer.analyze_command_output(
-                    command=state["generated_command"],
-                    output=output,
-                    user_intent=user_input
-                )
-                return {
-                    "analysis_result": analysis_result,
-                    "next_step": "present"
-                }
-
-        # Option 2: Try to extract file path from user input
-        if not content_to_analyze:
-            import re
-
-            # Extract potential file paths from user input
-            # Windows paths
-            win_paths = re.findall(r'([A-Z]:\\[^\s]+)|([a-z]:\\[^\s]+)', user_input)
-            # Relative paths
-            rel_paths = re.findall(r'([^\s]+\.[a-z]{2,4})', user_input)  # file.txt, script.py, etc.
-
-            potential_paths = [p for tup in win_paths for p in tup if p] + rel_paths
-
-            for path in potential_paths:
-                if os.path.exists(path) and os.path.isfile(path):
-                    file_result = await file_reader.read_file(path)
-                    content_to_analyze = file_result["content"]
-                    analysis_target = path
-                    break
-
-        # Option 3: Check if execution created/cloned a repository
-        if not content_to_analyze and state.get("execution_result"):
-            stdout = state["execution_result"].get("stdout", "")
-            # Check for git clone output
-            if "Cloning into" in stdout or "checkout" in state["generated_command"].lower():
-                # Try to find the repo directory
-                import re
-                clone_match = re.search(r"Cloning into '([^']+)'", stdout)
-                if clone_match:
-                    repo_path = clone_match.group(1)
-                    if os.path.exists(repo_path):
-                        repo_info = await file_reader.get_repository_structure(repo_path)
-                        analysis_result = await content_analyzer.analyze_code_repository(
-                            repo_path=repo_path,
-                            file_list=repo_info["file_list"],
-                            readme_content=repo_info.get("readme_content")
-                        )
-                        return {
-                            "analysis_result": analysis_result,
-                            "analysis_target": repo_path,
-                            "next_step": "present"
-                        }
-
-        # If we have content, analyze it
-        if content_to_analyze:
-            logger.info(f"Analyzing {analysis_type}: {analysis_target}")
-
-            analysis_result = await content_analyzer.analyze_file(
-                file_path=analysis_target or "content",
-                content=content_to_analyze,
-                analysis_type=analysis_type
-            )
+    tools = _build_tools()
 
-            return {
-                "analysis_result": analysis_result,
-                "analysis_target": analysis_target,
-                "content_to_analyze": content_to_analyze[:1000],  # Store sample
-                "next_step": "present"
-            }
+    try:
+        for handler in _ANALYSIS_HANDLERS:
+            result = await handler(state, tools)
+            if result:
+                return result
 
         # No content found to analyze
         logger.warning("No content found to analyze")
@@ -560,6 +789,9 @@ async def intelligent_retry_node(state: CommandState) -> Dict[str, Any]:
 
     logger.info("Node: intelligent_retry")
 
+    tools = _build_tools()
+    settings = get_settings()
+
     auto_retry_count = state.get("auto_retry_count", 0) + 1
 
     try:
@@ -573,26 +805,26 @@ async def intelligent_retry_node(state: CommandState) -> Dict[str, Any]:
         # Get previous failed attempts
         failed_attempts = state.get("failed_attempts", [])
 
-        logger.info(f"Analyzing failure (attempt {auto_retry_count}): {error_output[:200]}")
+        logger.info("Analyzing failure (attempt %d): %.200s", auto_retry_count, error_output)
 
         # Analyze the failure using LLM
         if execution_result.get("timed_out"):
             # Special handling for timeouts
-            analysis = await failure_analyzer.analyze_execution_timeout(
+            analysis = await tools.failure_analyzer.analyze_execution_timeout(
                 user_intent=state["user_input"],
                 command=failed_command,
                 timeout_seconds=settings.max_execution_timeout
             )
         elif auto_retry_count > 1 and len(failed_attempts) > 1:
             # Multiple failures - suggest alternative approach
-            analysis = await failure_analyzer.suggest_alternative_approach(
+            analysis = await tools.failure_analyzer.suggest_alternative_approach(
                 user_intent=state["user_input"],
                 failed_attempts=failed_attempts,
                 shell_type=shell_type
             )
         else:
             # Standard failure analysis
-            analysis = await failure_analyzer.analyze_failure(
+            analysis = await tools.failure_analyzer.analyze_failure(
                 user_intent=state["user_input"],
                 failed_command=failed_command,
                 error_output=error_output,
@@ -601,9 +833,9 @@ async def intelligent_retry_node(state: CommandState) -> Dict[str, Any]:
                 previous_attempts=failed_attempts[:-1] if len(failed_attempts) > 1 else None
             )
 
-        logger.info(f"Failure analysis: {analysis.get('failure_reason')}")
-        logger.info(f"Root cause: {analysis.get('root_cause')}")
-        logger.info(f"Suggested fix: {analysis.get('corrected_command')}")
+        logger.info("Failure analysis: %s", analysis.get("failure_reason"))
+        logger.info("Root cause: %s", analysis.get("root_cause"))
+        logger.info("Suggested fix: %s", analysis.get("corrected_command"))
 
         # Check if we should retry based on confidence and should_retry flag
         corrected_command = analysis.get("corrected_command")
@@ -616,7 +848,7 @@ async def intelligent_retry_node(state: CommandState) -> Dict[str, Any]:
         current_level = confidence_levels.get(confidence, 0)
 
         if not corrected_command or not should_retry or current_level < threshold_level:
-            logger.warning(f"Analysis suggests not to retry (confidence: {confidence}, should_retry: {should_retry})")
+            logger.warning("Analysis suggests not to retry (confidence: %s, should_retry: %s)", confidence, should_retry)
             return {
                 "auto_retry_count": auto_retry_count,
                 "failure_analysis": analysis,
@@ -625,7 +857,7 @@ async def intelligent_retry_node(state: CommandState) -> Dict[str, Any]:
             }
 
         # Assess safety of corrected command
-        safety_assessment = command_filter.assess(corrected_command)
+        safety_assessment = _assess_command(corrected_command)
 
         if not safety_assessment["allow"]:
             logger.warning("Corrected command blocked by safety filter")
@@ -637,7 +869,7 @@ async def intelligent_retry_node(state: CommandState) -> Dict[str, Any]:
             }
 
         # Update state with corrected command and retry
-        logger.info(f"Retrying with corrected command (attempt {auto_retry_count})")
+        logger.info("Retrying with corrected command (attempt %d)", auto_retry_count)
 
         return {
             "generated_command": corrected_command,
@@ -676,17 +908,14 @@ async def try_alternative_shell_node(state: CommandState) -> Dict[str, Any]:
 
     logger.info("Node: try_alternative_shell")
 
+    tools = _build_tools()
+
     attempted_shells = state.get("attempted_shells", [])
     current_shell = state.get("shell_type", "powershell")
 
     # Determine next shell to try
-    shell_order = ["powershell", "cmd", "bash"]
-    next_shell = None
-
-    for shell in shell_order:
-        if shell not in attempted_shells:
-            next_shell = shell
-            break
+    attempted = frozenset(attempted_shells)
+    next_shell = next((shell for shell in _SHELL_ORDER if shell not in attempted), None)
 
     if not next_shell:
         logger.warning("All shell types have been attempted")
@@ -695,7 +924,7 @@ async def try_alternative_shell_node(state: CommandState) -> Dict[str, Any]:
             "next_step": "present"
         }
 
-    logger.info(f"Trying alternative shell: {next_shell} (previous: {current_shell})")
+    logger.info("Trying alternative shell: %s (previous: %s)", next_shell, current_shell)
 
     try:
         # Ask LLM to generate command for the alternative shell
@@ -717,15 +946,15 @@ Please generate an equivalent {next_shell} command to accomplish the same task:
 Provide ONLY the {next_shell} command, no explanations."""
 
         # Generate command for alternative shell
-        generation_result = await command_generator.generate(
+        generation_result = await tools.command_generator.generate(
             user_input=prompt,
             context={"shell_type": next_shell}
         )
 
         # Assess safety
-        safety_assessment = command_filter.assess(generation_result["command"])
+        safety_assessment = _assess_command(generation_result["command"])
 
-        logger.info(f"Generated {next_shell} command: {generation_result['command']}")
+        logger.info("Generated %s command: %s", next_shell, generation_result["command"])
 
         return {
             "generated_command": generation_result["command"],
@@ -5,6 +5,11 @@ from operator import add
 from datetime import datetime
 
 
+def _keep_last(current: Any, update: Any) -> Any:
+    """Reducer that keeps the latest value, allowing parallel nodes to write it."""
+    return update
+
+
 class CommandState(TypedDict):
     """
     Complete state schema for the PowerShell command execution workflow.
@@ -37,6 +42,7 @@ class CommandState(TypedDict):
     ]
     execution_result: Optional[Dict[str, Any]]  # stdout, stderr, return_code
     execution_timestamp: Optional[datetime]
+    execution_timestamp_iso: Optional[str]  # execution_timestamp formatted once for history/serialization
 
     # Validation Phase
     validation_passed: Optional[bool]  # LLM validation result
@@ -66,7 +72,7 @@ class CommandState(TypedDict):
     content_to_analyze: Optional[str]  # Actual content extracted from files/output
 
     # Flow Control
-    next_step: Optional[Literal[
+    next_step: Annotated[Optional[Literal[
         "generate", "confirm", "execute",
         "validate", "present", "retry", "try_alternative", "analyze", "end"
-    ]]
+    ]], _keep_last]
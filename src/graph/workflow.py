@@ -1,7 +1,10 @@
 """LangGraph workflow construction and compilation."""
 
+from functools import lru_cache
+from pathlib import Path
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
+from config.settings import get_settings
 from graph.state import CommandState
 from graph.nodes import (
     generate_command_node,
@@ -21,13 +24,84 @@ from graph.edges import (
 )
 import logging
 
+# SQLite checkpointer (optional)
+try:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    SQLITE_CHECKPOINT_AVAILABLE = True
+except ImportError:
+    SQLITE_CHECKPOINT_AVAILABLE = False
+    aiosqlite = None
+    AsyncSqliteSaver = None
+
 logger = logging.getLogger(__name__)
 
 
+# Router return values mapped to target nodes, built once at import
+_CONFIRMATION_ROUTES = {
+    "execute_command": "execute_command",
+    "retry_node": "retry_node",
+    "end": END
+}
+
+_EXECUTION_ROUTES = {
+    "validate_result": "validate_result",
+    "analyze_content": "analyze_content",
+    "present_result": "present_result",
+    "intelligent_retry": "intelligent_retry",
+    "try_alternative_shell": "try_alternative_shell"
+}
+
+_RETRY_ROUTES = {
+    "generate_command": "generate_command",
+    "end": END
+}
+
+
+def _create_checkpointer():
+    """
+    Create the checkpointer used to persist workflow state between steps.
+
+    Prefers an SQLite-backed saver, which keeps checkpoints as serialized rows
+    instead of live Python objects. The database lives in memory unless
+    session persistence is enabled, in which case it is written under
+    checkpoint_dir. Falls back to MemorySaver when the SQLite saver is not
+    installed or no event loop is running.
+
+    Returns:
+        LangGraph checkpointer instance
+    """
+    if not SQLITE_CHECKPOINT_AVAILABLE:
+        return MemorySaver()
+
+    settings = get_settings()
+    if settings.session_persistence:
+        if settings.checkpoint_dir:
+            checkpoint_dir = Path(settings.checkpoint_dir)
+        else:
+            checkpoint_dir = Path.home() / ".claude" / "langgraph_powershell"
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        conn_string = str(checkpoint_dir / "checkpoints.sqlite")
+    else:
+        conn_string = ":memory:"
+
+    try:
+        # The connection is opened lazily by the saver on first use
+        return AsyncSqliteSaver(aiosqlite.connect(conn_string))
+    except RuntimeError as e:
+        logger.warning(f"SQLite checkpointer unavailable, using MemorySaver: {e}")
+        return MemorySaver()
+
+
+@lru_cache(maxsize=1)
 def create_workflow():
     """
     Construct the LangGraph workflow.
 
+    The graph topology is static, so it is compiled once and the same app is
+    shared by every caller. Sessions stay isolated through the per-session
+    thread_id in the checkpointer config.
+
     Graph structure:
     START → generate → confirm → execute → validate → present → END
                ↑          ↓
@@ -64,48 +138,21 @@ def create_workflow():
     workflow.add_conditional_edges(
         "await_confirmation",
         route_after_confirmation,
-        {
-            "execute_command": "execute_command",
-            "retry_node": "retry_node",
-            "end": END
-        }
+        _CONFIRMATION_ROUTES
     )
 
     # Conditional edge after execution
     workflow.add_conditional_edges(
         "execute_command",
         route_after_execution,
-        {
-            "validate_result": "validate_result",
-            "present_result": "present_result",
-            "intelligent_retry": "intelligent_retry",
-            "try_alternative_shell": "try_alternative_shell"
-        }
+        _EXECUTION_ROUTES
     )
 
     # After intelligent retry, go back to execute with corrected command
     workflow.add_edge("intelligent_retry", "execute_command")
 
-    # After validation, check if analysis is needed
-    def route_after_validation(state: CommandState):
-        """Route to analysis if needed, otherwise present."""
-        if state.get("requires_analysis"):
-            logger.debug("Routing to analyze_content (analysis required)")
-            return "analyze_content"
-        else:
-            logger.debug("Routing to present_result (no analysis needed)")
-            return "present_result"
-
-    workflow.add_conditional_edges(
-        "validate_result",
-        route_after_validation,
-        {
-            "analyze_content": "analyze_content",
-            "present_result": "present_result"
-        }
-    )
-
-    # After analysis, go to presentation
+    # Validation and analysis run side by side; presentation waits for both
+    workflow.add_edge("validate_result", "present_result")
     workflow.add_edge("analyze_content", "present_result")
 
     # After presentation, end
@@ -115,17 +162,14 @@ def create_workflow():
     workflow.add_conditional_edges(
         "retry_node",
         route_after_retry,
-        {
-            "generate_command": "generate_command",
-            "end": END
-        }
+        _RETRY_ROUTES
     )
 
     # After trying alternative shell, go back to execute
     workflow.add_edge("try_alternative_shell", "execute_command")
 
     # Add checkpointer for persistence
-    memory = MemorySaver()
+    memory = _create_checkpointer()
 
     # Compile graph
     app = workflow.compile(checkpointer=memory)
@@ -1,14 +1,16 @@
 """Interactive CLI for PowerShell command execution system."""
 
 import asyncio
+import importlib.util
 import logging
+import secrets
 from datetime import datetime
-from uuid import uuid4
 from typing import Optional
 from rich.prompt import Prompt, Confirm
 
-from config.settings import settings
+from config.settings import get_settings
 from graph.workflow import create_workflow
+from graph.nodes import close_tools
 from graph.state import CommandState
 from utils.logger import setup_logging
 from utils.cli_helpers import (
@@ -23,15 +25,63 @@ from utils.cli_helpers import (
 from security.sanitizer import sanitize_user_input
 from utils.conversation_memory import ConversationMemory
 
-# Audio/Voice imports (optional)
-try:
-    from tools.audio_recorder import AudioRecorder, AUDIO_AVAILABLE
-    from tools.whisper_transcriber import WhisperTranscriber
-    VOICE_ENABLED = AUDIO_AVAILABLE and settings.enable_voice_input
-except ImportError:
-    VOICE_ENABLED = False
-    AudioRecorder = None
-    WhisperTranscriber = None
+# Audio libraries needed for voice input (optional). They are only imported
+# on the first /voice command; see PowerShellCLI._load_voice().
+_VOICE_DEPENDENCIES = ("sounddevice", "soundfile", "numpy")
+
+# Special commands recognized by the interactive loop (matched lowercased)
+_EXIT_COMMANDS = frozenset({"exit", "quit", "q"})
+_VOICE_COMMANDS = frozenset({"/voice", "/v", "voice"})
+_HISTORY_COMMANDS = frozenset({"/history", "/h", "history"})
+_CLEAR_COMMANDS = frozenset({"/clear", "/c", "clear"})
+
+
+def _voice_dependencies_installed() -> bool:
+    """Check whether the audio libraries are installed without importing them."""
+    return all(importlib.util.find_spec(name) is not None for name in _VOICE_DEPENDENCIES)
+
+
+# Per-turn defaults for the workflow state; execute_workflow copies this and
+# fills in the request-specific fields. The empty lists are never mutated:
+# their fields use the add reducer, which always builds new lists.
+_INITIAL_STATE_TEMPLATE: CommandState = {
+    "user_input": "",
+    "session_id": "",
+    "timestamp": None,
+    "generated_command": None,
+    "command_explanation": None,
+    "safety_assessment": None,
+    "shell_type": "powershell",  # Start with PowerShell
+    "attempted_shells": [],
+    "user_confirmed": None,
+    "confirmation_timestamp": None,
+    "user_feedback": None,
+    "execution_status": "pending",
+    "execution_result": None,
+    "execution_timestamp": None,
+    "execution_timestamp_iso": None,
+    "validation_passed": None,
+    "validation_reasoning": None,
+    "validation_suggestions": None,
+    "requires_analysis": None,
+    "analysis_type": None,
+    "analysis_target": None,
+    "analysis_result": None,
+    "content_to_analyze": None,
+    "error_message": None,
+    "error_type": None,
+    "retry_count": 0,
+    "max_retries": 3,
+    "auto_retry_count": 0,
+    "max_auto_retries": 2,
+    "failure_analysis": None,
+    "failed_attempts": [],
+    "messages": [],
+    "execution_history": [],
+    "conversation_messages": [],
+    "next_step": "generate"
+}
+
 
 
 class PowerShellCLI:
@@ -41,21 +91,22 @@ class PowerShellCLI:
 
     def __init__(self):
         """Initialize the CLI."""
+        self.settings = get_settings()
         self.workflow = create_workflow()
-        self.session_id = str(uuid4())
-        setup_logging(settings.log_level, settings.log_file)
+        self.session_id = secrets.token_hex(12)  # 96-bit random thread id
+        setup_logging(self.settings.log_level, self.settings.log_file)
         self.logger = logging.getLogger(__name__)
 
         # Initialize conversation memory
-        self.memory_enabled = settings.enable_conversation_memory
+        self.memory_enabled = self.settings.enable_conversation_memory
         if self.memory_enabled:
             try:
                 self.conversation_memory = ConversationMemory(
-                    max_conversations=settings.max_conversations_in_memory,
-                    storage_file=settings.memory_storage_file,
+                    max_conversations=self.settings.max_conversations_in_memory,
+                    storage_file=self.settings.memory_storage_file,
                     enable_persistence=True
                 )
-                self.logger.info(f"Conversation memory enabled ({settings.max_conversations_in_memory} conversations)")
+                self.logger.info(f"Conversation memory enabled ({self.settings.max_conversations_in_memory} conversations)")
             except Exception as e:
                 self.logger.warning(f"Conversation memory disabled: {e}")
                 self.memory_enabled = False
@@ -63,28 +114,44 @@ class PowerShellCLI:
         else:
             self.conversation_memory = None
 
-        # Initialize voice components if available
-        self.voice_enabled = VOICE_ENABLED
-        if self.voice_enabled:
-            try:
-                self.audio_recorder = AudioRecorder(
-                    sample_rate=settings.audio_sample_rate,
-                    channels=settings.audio_channels,
-                    silence_threshold=settings.silence_threshold,
-                    auto_stop_silence_duration=settings.auto_stop_silence_duration
-                )
-                self.transcriber = WhisperTranscriber(
-                    api_key=settings.openai_api_key,
-                    model=settings.whisper_model,
-                    use_local=settings.use_local_whisper
-                )
-                self.logger.info("Voice input enabled")
-            except Exception as e:
-                self.logger.warning(f"Voice input disabled: {e}")
-                self.voice_enabled = False
-        else:
+        # Voice components are created on the first /voice command
+        self.voice_enabled = self.settings.enable_voice_input and _voice_dependencies_installed()
+        self.audio_recorder = None
+        self.transcriber = None
+
+    def _load_voice(self) -> bool:
+        """
+        Import and initialize the voice components on first use.
+
+        Returns:
+            True if voice input is ready, False if it could not be initialized
+        """
+        if self.audio_recorder is not None:
+            return True
+
+        try:
+            from tools.audio_recorder import AudioRecorder
+            from tools.whisper_transcriber import WhisperTranscriber
+
+            self.audio_recorder = AudioRecorder(
+                sample_rate=self.settings.audio_sample_rate,
+                channels=self.settings.audio_channels,
+                silence_threshold=self.settings.silence_threshold,
+                auto_stop_silence_duration=self.settings.auto_stop_silence_duration
+            )
+            self.transcriber = WhisperTranscriber(
+                api_key=self.settings.openai_api_key,
+                model=self.settings.whisper_model,
+                use_local=self.settings.use_local_whisper
+            )
+            self.logger.info("Voice input enabled")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Voice input disabled: {e}")
+            self.voice_enabled = False
             self.audio_recorder = None
             self.transcriber = None
+            return False
 
     def display_conversation_history(self) -> None:
         """Display conversation history from memory."""
@@ -133,7 +200,7 @@ class PowerShellCLI:
         Returns:
             Transcribed text or None if failed
         """
-        if not self.voice_enabled:
+        if not self.voice_enabled or not self._load_voice():
             console.print("[yellow]Voice input is not available[/yellow]")
             return None
 
@@ -146,10 +213,14 @@ class PowerShellCLI:
             console.print("\n[bold green]🎙️  Voice Mode Activated[/bold green]")
             console.print("[dim]Speak your command (will auto-stop on silence)...[/dim]")
 
+            # Connect to the transcription service while the user is speaking
+            warm_up = asyncio.create_task(self.transcriber.warm_up())
+
             audio_file = await self.audio_recorder.record_until_silence(
-                max_duration=settings.recording_duration,
+                max_duration=self.settings.recording_duration,
                 callback=status_callback
             )
+            await warm_up
 
             if not audio_file:
                 console.print("[yellow]No audio recorded[/yellow]")
@@ -157,7 +228,10 @@ class PowerShellCLI:
 
             # Transcribe audio
             console.print("[cyan]🔄 Transcribing...[/cyan]")
-            result = await self.transcriber.transcribe_file(audio_file)
+            try:
+                result = await self.transcriber.transcribe_file(audio_file)
+            finally:
+                self.audio_recorder.release_temp_path(audio_file)
 
             transcribed_text = result["text"]
             console.print(f"\n[bold green]✓ Transcribed:[/bold green] {transcribed_text}\n")
@@ -192,12 +266,14 @@ class PowerShellCLI:
                 # Get user input
                 user_input = Prompt.ask("\n[bold cyan]Enter command request[/bold cyan]")
 
-                if user_input.lower() in ["exit", "quit", "q"]:
+                special_command = user_input.strip().lower()
+
+                if special_command in _EXIT_COMMANDS:
                     display_goodbye()
                     break
 
                 # Check for voice command
-                if user_input.lower() in ["/voice", "/v", "voice"]:
+                if special_command in _VOICE_COMMANDS:
                     if not self.voice_enabled:
                         console.print("[yellow]Voice input is not available[/yellow]")
                         continue
@@ -207,12 +283,12 @@ class PowerShellCLI:
                         continue
 
                 # Check for history command
-                if user_input.lower() in ["/history", "/h", "history"]:
+                elif special_command in _HISTORY_COMMANDS:
                     self.display_conversation_history()
                     continue
 
                 # Check for clear history command
-                if user_input.lower() in ["/clear", "/c", "clear"]:
+                elif special_command in _CLEAR_COMMANDS:
                     if self.memory_enabled:
                         self.conversation_memory.clear_memory()
                         console.print("[green]✓ Conversation history cleared[/green]")
@@ -246,63 +322,37 @@ class PowerShellCLI:
 
         # Get conversation history context if enabled
         conversation_messages = []
-        if self.memory_enabled and settings.include_context_in_prompt:
+        if self.memory_enabled and self.settings.include_context_in_prompt and len(self.conversation_memory):
             conversation_messages = self.conversation_memory.get_context_messages(
-                include_last_n=settings.context_conversations_count
+                include_last_n=self.settings.context_conversations_count
             )
             if conversation_messages:
                 self.logger.debug(f"Using {len(conversation_messages)} conversation messages as context")
 
         # Initialize state
-        initial_state: CommandState = {
-            "user_input": user_input,
-            "session_id": self.session_id,
-            "timestamp": datetime.now(),
-            "generated_command": None,
-            "command_explanation": None,
-            "safety_assessment": None,
-            "shell_type": "powershell",  # Start with PowerShell
-            "attempted_shells": [],
-            "user_confirmed": None,
-            "confirmation_timestamp": None,
-            "user_feedback": None,
-            "execution_status": "pending",
-            "execution_result": None,
-            "execution_timestamp": None,
-            "validation_passed": None,
-            "validation_reasoning": None,
-            "validation_suggestions": None,
-            "requires_analysis": None,
-            "analysis_type": None,
-            "analysis_target": None,
-            "analysis_result": None,
-            "content_to_analyze": None,
-            "error_message": None,
-            "error_type": None,
-            "retry_count": 0,
-            "max_retries": settings.max_retries,
-            "auto_retry_count": 0,
-            "max_auto_retries": settings.max_auto_retries,
-            "failure_analysis": None,
-            "failed_attempts": [],
-            "messages": [],
-            "execution_history": [],
-            "conversation_messages": conversation_messages,  # Add conversation context
-            "next_step": "generate"
-        }
+        initial_state: CommandState = _INITIAL_STATE_TEMPLATE.copy()
+        initial_state.update(
+            user_input=user_input,
+            session_id=self.session_id,
+            timestamp=datetime.now(),
+            max_retries=self.settings.max_retries,
+            max_auto_retries=self.settings.max_auto_retries,
+            conversation_messages=conversation_messages  # Add conversation context
+        )
 
         # Configuration for workflow
         config = {"configurable": {"thread_id": self.session_id}}
 
         try:
             # Start the workflow
-            stream_mode = initial_state
+            workflow_input = initial_state
 
             while True:
                 interrupted = False
 
-                # Execute workflow with interrupt handling
-                async for event in self.workflow.astream(stream_mode, config):
+                # Execute workflow with interrupt handling. Only per-node updates
+                # are streamed; an interrupt arrives as an "__interrupt__" update.
+                async for event in self.workflow.astream(workflow_input, config, stream_mode="updates"):
                     # Handle interrupt for confirmation
                     if "__interrupt__" in event:
                         interrupted = True
@@ -341,7 +391,7 @@ class PowerShellCLI:
 
                 # If interrupted, resume from checkpoint
                 if interrupted:
-                    stream_mode = None
+                    workflow_input = None
                 else:
                     # Workflow completed, exit loop
                     break
@@ -380,11 +430,28 @@ class PowerShellCLI:
             self.logger.exception(f"Workflow execution failed: {e}")
             display_error(f"Workflow execution failed: {str(e)}")
 
+    async def close(self) -> None:
+        """Write pending memory, stop the persistent shell and close the checkpointer connection, if any."""
+        if self.conversation_memory is not None:
+            self.conversation_memory.flush()
+
+        await close_tools()
+
+        conn = getattr(self.workflow.checkpointer, "conn", None)
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception as e:
+                self.logger.warning(f"Failed to close checkpointer: {e}")
+
 
 async def main():
     """Entry point."""
     cli = PowerShellCLI()
-    await cli.run_interactive_loop()
+    try:
+        await cli.run_interactive_loop()
+    finally:
+        await cli.close()
 
 
 if __name__ == "__main__":
@@ -2,20 +2,9 @@
 
 from typing import Dict, Optional
 
-
-def get_generation_prompt(user_input: str, context: Optional[Dict] = None) -> Dict[str, str]:
-    """
-    Generate prompts for command generation.
-
-    Args:
-        user_input: The user's natural language request
-        context: Optional context including previous feedback
-
-    Returns:
-        Dictionary with 'system' and 'user' prompts
-    """
-
-    system_prompt = """You are an expert PowerShell command generator for Windows systems.
+# Built once at import; an identical system prompt on every request also lets
+# the provider reuse its cached prompt prefix
+SYSTEM_PROMPT = """You are an expert PowerShell command generator for Windows systems.
 
 Your role:
 1. Convert natural language requests into safe, efficient PowerShell commands
@@ -75,10 +64,27 @@ Response: {
     "assumptions": []
 }"""
 
-    user_prompt = f"""User request: {user_input}
+_USER_PROMPT_TEMPLATE = """User request: {user_input}
 
 Generate a PowerShell command to fulfill this request."""
 
+
+def get_generation_prompt(user_input: str, context: Optional[Dict] = None) -> Dict[str, str]:
+    """
+    Generate prompts for command generation.
+
+    Args:
+        user_input: The user's natural language request
+        context: Optional context including previous feedback
+
+    Returns:
+        Dictionary with 'system' and 'user' prompts
+    """
+
+    system_prompt = SYSTEM_PROMPT
+
+    user_prompt = _USER_PROMPT_TEMPLATE.format(user_input=user_input)
+
     if context and context.get("previous_feedback"):
         user_prompt += f"""
 
@@ -4,18 +4,15 @@ from typing import List
 
 # Dangerous PowerShell patterns that should be blocked or heavily warned
 DANGEROUS_PATTERNS: List[str] = [
-    r'Remove-Item.*-Recurse.*-Force',  # Recursive forced deletion
-    r'Format-Volume',  # Disk formatting
-    r'Stop-Computer',  # Shutdown
-    r'Restart-Computer',  # Restart
-    r'Remove-Item.*\\Windows',  # System folder deletion
+    # Recursive forced deletion, system folder deletion, deleting from C: root.
+    # Patterns sharing a prefix are merged so the prefix is scanned once.
+    r'Remove-Item.*(?:-Recurse.*-Force|\\Windows|-Path\s+C:\\)',
+    r'Format-Volume|Stop-Computer|Restart-Computer',  # Disk formatting, shutdown, restart
     r'Set-ItemProperty.*HKLM',  # Registry modification
-    r'Invoke-Expression',  # Code injection risk
-    r'iex\s',  # Alias for Invoke-Expression
-    r'Start-Process.*-Verb RunAs',  # Elevation
+    r'Invoke-Expression|\biex\s',  # Code injection risk (and its alias)
+    r'Start-Process.*-Verb\s+RunAs',  # Elevation
     r'Disable-WindowsDefender',  # Security disabling
     r'Set-ExecutionPolicy.*Unrestricted',  # Policy bypass
-    r'Remove-Item.*-Path\s+C:\\',  # Deleting from C: root
     r'Clear-RecycleBin.*-Force',  # Empty recycle bin without confirmation
 ]
 
@@ -1,6 +1,35 @@
 """Prompts for result validation."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Union
+
+# Characters of each output stream included in the prompt
+_PREVIEW_CHARS = 1000
+
+
+def _preview(raw: Optional[Union[str, bytes]]) -> str:
+    """
+    Build the prompt preview of an output stream.
+
+    Only the preview prefix is copied (and decoded, for bytes), so large
+    outputs are never duplicated in full.
+
+    Args:
+        raw: Captured stdout or stderr
+
+    Returns:
+        Preview text, marked when truncated
+    """
+    if not raw:
+        return "(empty)"
+
+    if isinstance(raw, (bytes, bytearray)):
+        preview = bytes(memoryview(raw)[:_PREVIEW_CHARS]).decode("utf-8", errors="replace")
+    else:
+        preview = raw[:_PREVIEW_CHARS]
+
+    if len(raw) > _PREVIEW_CHARS:
+        preview += "\n... (output truncated)"
+    return preview
 
 
 def get_validation_prompt(
@@ -49,13 +78,8 @@ Guidelines:
 - Check if output actually matches what user asked for
 - Consider edge cases (no results found vs. error searching)"""
 
-    stdout_preview = execution_result.get('stdout', '(empty)')[:1000]
-    stderr_preview = execution_result.get('stderr', '(empty)')[:1000]
-
-    if len(execution_result.get('stdout', '')) > 1000:
-        stdout_preview += "\n... (output truncated)"
-    if len(execution_result.get('stderr', '')) > 1000:
-        stderr_preview += "\n... (output truncated)"
+    stdout_preview = _preview(execution_result.get('stdout'))
+    stderr_preview = _preview(execution_result.get('stderr'))
 
     user_prompt = f"""User's original intent: {user_intent}
 
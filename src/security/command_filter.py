@@ -1,21 +1,163 @@
 """Filters and detects dangerous PowerShell commands."""
 
+import logging
 import re
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 from prompts.safety import DANGEROUS_PATTERNS, SUSPICIOUS_PATTERNS
 
+# Hyperscan is optional: when installed, all patterns of a severity class are
+# matched in one DFA pass; otherwise the compiled `re` patterns are used.
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+    hyperscan = None
+
+# Read-only cmdlets that cannot delete, modify or execute anything on their own
+_SAFE_VERB_PREFIXES = (
+    "get-", "test-", "select-", "sort-", "measure-",
+    "format-table", "format-list", "where-object"
+)
+
+# Characters that chain commands or evaluate nested expressions; a command
+# containing any of them always goes through the full pattern scan
+_CHAIN_CHARS = ("|", ";", "&", "`", "(", "{", "\n", "\r")
+
+
+def _is_trivially_safe(command: str) -> bool:
+    """
+    Check whether command is a single read-only cmdlet invocation.
+
+    Args:
+        command: Command to check
+
+    Returns:
+        True if the pattern scan can be skipped
+    """
+    if not command.lstrip().lower().startswith(_SAFE_VERB_PREFIXES):
+        return False
+    return not any(c in command for c in _CHAIN_CHARS)
+
+
+def _compile_patterns(patterns: List[str]) -> Tuple[Pattern, List[Tuple[str, Pattern]]]:
+    """
+    Compile a pattern list once for repeated matching.
+
+    Args:
+        patterns: Regex pattern strings
+
+    Returns:
+        Tuple of (fused alternation of all patterns, list of (pattern, compiled))
+    """
+    fused = re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+    compiled = [(p, re.compile(p, re.IGNORECASE)) for p in patterns]
+    return fused, compiled
+
+
+def _compile_hyperscan(patterns: List[str]):
+    """
+    Compile a pattern list into a Hyperscan block-mode database.
+
+    Args:
+        patterns: Regex pattern strings
+
+    Returns:
+        Compiled hyperscan.Database; match ids are indexes into patterns
+    """
+    database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    database.compile(
+        expressions=[p.encode() for p in patterns],
+        ids=list(range(len(patterns))),
+        elements=len(patterns),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(patterns)
+    )
+    return database
+
+
+def _make_result(level: str, matched: List[str], warnings: List[str], allow: bool) -> Dict[str, Any]:
+    """
+    Build the assessment dictionary returned by CommandFilter.assess().
+
+    Args:
+        level: "safe", "suspicious", or "dangerous"
+        matched: Matched regex patterns
+        warnings: Warning messages
+        allow: Whether the command should be allowed
+
+    Returns:
+        Assessment dictionary
+    """
+    return {
+        "level": level,
+        "matched_patterns": matched,
+        "warnings": warnings,
+        "allow": allow
+    }
+
 
 class CommandFilter:
     """
     Filters and detects dangerous PowerShell commands.
     """
 
-    def __init__(self):
+    def __init__(self) -> None:
         """Initialize the command filter."""
         self.dangerous_patterns = DANGEROUS_PATTERNS
         self.suspicious_patterns = SUSPICIOUS_PATTERNS
+        self.logger = logging.getLogger(__name__)
+
+        # A single scan with the fused pattern rules out a whole severity
+        # class; the per-pattern list is only used to report which matched
+        self._dangerous_any, self._dangerous_compiled = _compile_patterns(DANGEROUS_PATTERNS)
+        self._suspicious_any, self._suspicious_compiled = _compile_patterns(SUSPICIOUS_PATTERNS)
+
+        self._dangerous_db = None
+        self._suspicious_db = None
+        if HYPERSCAN_AVAILABLE:
+            try:
+                self._dangerous_db = _compile_hyperscan(DANGEROUS_PATTERNS)
+                self._suspicious_db = _compile_hyperscan(SUSPICIOUS_PATTERNS)
+            except Exception as e:
+                self.logger.warning(f"Hyperscan unavailable, using re patterns: {e}")
+                self._dangerous_db = self._suspicious_db = None
+
+    def _match(
+        self,
+        command: str,
+        patterns: List[str],
+        fused: Pattern,
+        compiled: List[Tuple[str, Pattern]],
+        database: Optional[Any]
+    ) -> List[str]:
+        """
+        Return the patterns of one severity class that match command.
 
-    def assess(self, command: str) -> Dict:
+        Args:
+            command: Command to scan
+            patterns: Pattern strings of the class
+            fused: Fused alternation of the class
+            compiled: Individually compiled patterns of the class
+            database: Hyperscan database of the class, if available
+
+        Returns:
+            Matched pattern strings, in declaration order
+        """
+        if database is not None:
+            matched_ids: set = set()
+
+            def on_match(pattern_id: int, start: int, end: int, flags: int, context: Any) -> None:
+                matched_ids.add(pattern_id)
+
+            database.scan(command.encode("utf-8", errors="replace"), match_event_handler=on_match)
+            return [patterns[i] for i in sorted(matched_ids)]
+
+        if not fused.search(command):
+            return []
+
+        return [pattern for pattern, regex in compiled if regex.search(command)]
+
+    def assess(self, command: str) -> Dict[str, Any]:
         """
         Assess command safety.
 
@@ -30,37 +172,35 @@ class CommandFilter:
             - allow: Boolean indicating if command should be allowed
         """
 
-        matched_dangerous = []
-        matched_suspicious = []
-        warnings = []
+        # A lone read-only cmdlet needs no regex scan
+        if _is_trivially_safe(command):
+            return _make_result("safe", [], [], True)
+
+        matched_suspicious: List[str] = []
+        warnings: List[str] = []
 
         # Check dangerous patterns
-        for pattern in self.dangerous_patterns:
-            if re.search(pattern, command, re.IGNORECASE):
-                matched_dangerous.append(pattern)
-                warnings.append(f"DANGER: Potentially destructive operation detected matching: {pattern}")
+        matched_dangerous = self._match(
+            command, self.dangerous_patterns,
+            self._dangerous_any, self._dangerous_compiled, self._dangerous_db
+        )
+        for pattern in matched_dangerous:
+            warnings.append(f"DANGER: Potentially destructive operation detected matching: {pattern}")
 
         # Check suspicious patterns (only if not already dangerous)
         if not matched_dangerous:
-            for pattern in self.suspicious_patterns:
-                if re.search(pattern, command, re.IGNORECASE):
-                    matched_suspicious.append(pattern)
-                    warnings.append(f"CAUTION: Potentially risky operation detected matching: {pattern}")
+            matched_suspicious = self._match(
+                command, self.suspicious_patterns,
+                self._suspicious_any, self._suspicious_compiled, self._suspicious_db
+            )
+            for pattern in matched_suspicious:
+                warnings.append(f"CAUTION: Potentially risky operation detected matching: {pattern}")
 
         # Determine level
         if matched_dangerous:
-            level = "dangerous"
-            allow = False  # Block dangerous commands by default
-        elif matched_suspicious:
-            level = "suspicious"
-            allow = True  # Allow but warn
-        else:
-            level = "safe"
-            allow = True
-
-        return {
-            "level": level,
-            "matched_patterns": matched_dangerous + matched_suspicious,
-            "warnings": warnings,
-            "allow": allow
-        }
+            # Block dangerous commands by default
+            return _make_result("dangerous", matched_dangerous, warnings, False)
+        if matched_suspicious:
+            # Allow but warn
+            return _make_result("suspicious", matched_suspicious, warnings, True)
+        return _make_result("safe", [], warnings, True)
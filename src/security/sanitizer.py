@@ -2,6 +2,9 @@
 
 from typing import Any
 
+# Maximum accepted length of a user request
+_MAX_USER_INPUT = 1000
+
 
 def sanitize_output(output: str, max_length: int = 10000) -> str:
     """
@@ -55,11 +58,11 @@ def sanitize_user_input(user_input: str) -> str:
     Returns:
         Sanitized input string
     """
-    # Strip whitespace
-    sanitized = user_input.strip()
-
-    # Limit length
-    if len(sanitized) > 1000:
-        sanitized = sanitized[:1000]
-
-    return sanitized
+    # Already clean: nothing to strip and within the limit
+    if len(user_input) <= _MAX_USER_INPUT and not (
+        user_input[:1].isspace() or user_input[-1:].isspace()
+    ):
+        return user_input
+
+    # Strip whitespace and limit length
+    return user_input.strip()[:_MAX_USER_INPUT]
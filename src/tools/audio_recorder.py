@@ -1,8 +1,13 @@
 """Audio recording module for capturing microphone input."""
 
 import asyncio
+import atexit
 import logging
+import queue
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict
 import tempfile
 import os
@@ -18,8 +23,56 @@ except ImportError:
     sf = None
     np = None
 
+# Numba is optional: when installed, the per-block silence check is compiled
+# to native code instead of running as numpy calls under the GIL
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    numba = None
+
 logger = logging.getLogger(__name__)
 
+# Audio is captured as 16-bit PCM, the format written to the WAV file
+_INT16_FULL_SCALE = 32768
+
+# Released recording files kept for reuse
+_TEMP_POOL_SIZE = 4
+
+
+def _update_silent_frames(flat, threshold_sq: float, silent_frames: int, frames_count: int) -> int:
+    """
+    Extend the silent run on a quiet block, reset it on sound.
+
+    Args:
+        flat: One-dimensional int16 samples of the block
+        threshold_sq: Squared int16 silence threshold
+        silent_frames: Frames of silence so far
+        frames_count: Frames in the block
+
+    Returns:
+        Updated count of consecutive silent frames
+    """
+    # Sum of squares accumulated in int64 so int16 samples cannot overflow;
+    # comparing it to the squared threshold skips the sqrt
+    sum_sq = int(np.einsum('i,i->', flat, flat, dtype=np.int64))
+    is_silent = sum_sq < threshold_sq * flat.size
+    return (silent_frames + frames_count) * is_silent
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def _update_silent_frames(flat, threshold_sq, silent_frames, frames_count):  # noqa: F811
+        """Compiled equivalent of the numpy implementation above."""
+        sum_sq = 0
+        for i in range(flat.size):
+            sample = np.int64(flat[i])
+            sum_sq += sample * sample
+        if sum_sq < threshold_sq * flat.size:
+            return silent_frames + frames_count
+        return 0
+
 
 class AudioRecorder:
     """
@@ -55,6 +108,7 @@ class AudioRecorder:
 
         self.sample_rate = sample_rate
         self.channels = channels
+        self._is_mono = channels == 1
         self.silence_threshold = silence_threshold
         self.auto_stop_silence_duration = auto_stop_silence_duration
 
@@ -63,6 +117,18 @@ class AudioRecorder:
         self.silence_start_time = None
         self.logger = logging.getLogger(__name__)
 
+        if NUMBA_AVAILABLE:
+            # Compile (or load from cache) now rather than in the first callback
+            _update_silent_frames(np.zeros(1, dtype=np.int16), 0.0, 0, 1)
+
+        # Recordings run on their own thread so they never queue behind other
+        # work in the loop's shared default executor
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-rec")
+
+        # Spare WAV paths reused by later recordings; see release_temp_path()
+        self._temp_paths: deque = deque()
+        atexit.register(self._remove_temp_paths)
+
     async def record_until_silence(
         self,
         max_duration: int = 10,
@@ -93,9 +159,9 @@ class AudioRecorder:
 
         try:
             # Record in a separate thread to avoid blocking
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             audio_file = await loop.run_in_executor(
-                None,
+                self._executor,
                 self._record_blocking,
                 max_duration,
                 callback
@@ -116,6 +182,10 @@ class AudioRecorder:
         """
         Blocking recording method (runs in executor).
 
+        Audio blocks are queued by the stream callback and written to the WAV
+        file by a separate thread while recording, so the samples are never
+        held in memory as a whole.
+
         Args:
             max_duration: Maximum duration in seconds
             callback: Status callback
@@ -124,88 +194,122 @@ class AudioRecorder:
             Path to audio file
         """
 
-        frames = []
+        temp_path = self._acquire_temp_path()
+
+        blocks = queue.SimpleQueue()
+        silence_event = threading.Event()
+        frames_written = 0
         start_time = time.time()
-        silence_start = None
+        # Silence is measured in frames, so the callback never reads a clock
+        silent_frames = 0
+        silence_frames_limit = int(self.auto_stop_silence_duration * self.sample_rate)
+        # The threshold is relative to full scale, so scale it to int16
+        silence_threshold_sq = (self.silence_threshold * _INT16_FULL_SCALE) ** 2
+        # Bound once; the callback runs on the audio thread for every block
+        log = self.logger
+        is_mono = self._is_mono
 
         def audio_callback(indata, frames_count, time_info, status):
             """Callback for sounddevice stream."""
             if status:
-                self.logger.warning(f"Audio callback status: {status}")
-
-            # Calculate RMS (root mean square) to detect silence
-            rms = np.sqrt(np.mean(indata**2))
+                log.warning("Audio callback status: %s", status)
 
-            # Append audio data
-            frames.append(indata.copy())
+            # Hand the block to the writer thread; indata is reused by the
+            # stream once the callback returns, so it must be copied
+            blocks.put(indata.copy())
 
             # Check for silence
-            nonlocal silence_start
-            if rms < self.silence_threshold:
-                if silence_start is None:
-                    silence_start = time.time()
-                elif time.time() - silence_start >= self.auto_stop_silence_duration:
-                    # Stop on prolonged silence
-                    raise sd.CallbackStop()
-            else:
-                # Reset silence timer on sound detection
-                silence_start = None
+            # A mono block's only column is already a flat view
+            nonlocal silent_frames
+            flat = indata[:, 0] if is_mono else indata.reshape(-1)
+            silent_frames = _update_silent_frames(
+                flat, silence_threshold_sq, silent_frames, frames_count
+            )
+            if silent_frames >= silence_frames_limit:
+                # Stop on prolonged silence and wake the waiting thread
+                silence_event.set()
+                raise sd.CallbackStop()
+
+        def write_blocks(sound_file):
+            """Write queued blocks to the WAV file until the end marker."""
+            nonlocal frames_written
+            while True:
+                block = blocks.get()
+                if block is None:
+                    break
+                sound_file.write(block)
+                frames_written += len(block)
 
         try:
-            # Start recording stream
-            with sd.InputStream(
+            with sf.SoundFile(
+                temp_path,
+                mode='w',
                 samplerate=self.sample_rate,
                 channels=self.channels,
-                callback=audio_callback,
-                dtype='float32'
-            ):
-                # Wait for max duration or until callback stops
-                elapsed = 0
-                while elapsed < max_duration and self.is_recording:
-                    sd.sleep(100)  # Sleep 100ms
-                    elapsed = time.time() - start_time
-
-                    # Update UI every second
-                    if callback and int(elapsed) != int(elapsed - 0.1):
-                        remaining = max_duration - int(elapsed)
-                        if silence_start:
-                            silence_duration = time.time() - silence_start
-                            callback(f"🔇 Silence detected ({silence_duration:.1f}s)...")
-                        else:
-                            callback(f"🎤 Recording... ({remaining}s remaining)")
-
-        except sd.CallbackStop:
-            self.logger.info("Recording stopped due to silence detection")
-            if callback:
-                callback("✓ Silence detected, processing...")
+                subtype='PCM_16'
+            ) as sound_file:
+                writer = threading.Thread(target=write_blocks, args=(sound_file,), daemon=True)
+                writer.start()
+
+                try:
+                    # Start recording stream
+                    with sd.InputStream(
+                        samplerate=self.sample_rate,
+                        channels=self.channels,
+                        callback=audio_callback,
+                        dtype='int16'
+                    ):
+                        # Wake once per second to update the UI, until the
+                        # callback signals silence, the user stops, or time is up
+                        deadline = start_time + max_duration
+                        last_message = None
+                        while self.is_recording:
+                            remaining = deadline - time.time()
+                            if remaining <= 0 or silence_event.wait(min(1.0, remaining)):
+                                break
+
+                            if callback:
+                                if silent_frames:
+                                    silence_duration = silent_frames / self.sample_rate
+                                    message = f"🔇 Silence detected ({silence_duration:.1f}s)..."
+                                else:
+                                    remaining = max(0, int(deadline - time.time()))
+                                    message = f"🎤 Recording... ({remaining}s remaining)"
+
+                                # Only changed messages reach the UI
+                                if message != last_message:
+                                    callback(message)
+                                    last_message = message
+
+                    if silence_event.is_set():
+                        self.logger.info("Recording stopped due to silence detection")
+                        if callback:
+                            callback("✓ Silence detected, processing...")
+
+                finally:
+                    # Flush the remaining blocks before the file is closed
+                    blocks.put(None)
+                    writer.join()
+
+        except Exception:
+            self.release_temp_path(temp_path)
+            raise
 
         # Check if we got any audio
-        if not frames:
+        if not frames_written:
+            self.release_temp_path(temp_path)
             self.logger.warning("No audio data recorded")
             if callback:
                 callback("⚠ No audio detected")
             return None
 
-        # Concatenate all frames
-        audio_data = np.concatenate(frames, axis=0)
-
-        # Save to temporary WAV file
-        temp_file = tempfile.NamedTemporaryFile(
-            delete=False,
-            suffix='.wav',
-            prefix='voice_input_'
-        )
-        temp_file.close()
-
-        sf.write(temp_file.name, audio_data, self.sample_rate)
-
-        duration = len(audio_data) / self.sample_rate
-        self.logger.info(f"Recorded {duration:.2f}s of audio, saved to {temp_file.name}")
+        duration = frames_written / self.sample_rate
+        self.logger.info(f"Recorded {duration:.2f}s of audio, saved to {temp_path}")
 
         if callback:
             callback(f"✓ Recorded {duration:.1f}s")
 
-        return temp_file.name
+        return temp_path
 
     async def record_fixed_duration(self, duration: int = 5) -> Optional[str]:
         """
@@ -221,32 +325,87 @@ class AudioRecorder:
         self.logger.info(f"Recording {duration}s of audio")
 
         try:
-            # Record synchronously
-            audio_data = sd.rec(
-                int(duration * self.sample_rate),
-                samplerate=self.sample_rate,
-                channels=self.channels,
-                dtype='float32'
-            )
-            sd.wait()  # Wait for recording to finish
-
-            # Save to temporary file
-            temp_file = tempfile.NamedTemporaryFile(
-                delete=False,
-                suffix='.wav',
-                prefix='voice_input_'
+            loop = asyncio.get_running_loop()
+            temp_path = await loop.run_in_executor(
+                self._executor,
+                self._record_fixed_blocking,
+                duration
             )
-            temp_file.close()
 
-            sf.write(temp_file.name, audio_data, self.sample_rate)
-
-            self.logger.info(f"Audio saved to {temp_file.name}")
-            return temp_file.name
+            self.logger.info(f"Audio saved to {temp_path}")
+            return temp_path
 
         except Exception as e:
             self.logger.error(f"Recording failed: {e}")
             return None
 
+    def _record_fixed_blocking(self, duration: int) -> str:
+        """
+        Blocking fixed-duration recording (runs in executor).
+
+        Args:
+            duration: Recording duration in seconds
+
+        Returns:
+            Path to audio file
+        """
+        audio_data = sd.rec(
+            int(duration * self.sample_rate),
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype='int16'
+        )
+        sd.wait()  # Wait for recording to finish
+
+        # Save to temporary file
+        temp_path = self._acquire_temp_path()
+
+        sf.write(temp_path, audio_data, self.sample_rate, subtype='PCM_16')
+
+        return temp_path
+
+    def _acquire_temp_path(self) -> str:
+        """
+        Return a WAV path for a new recording, reusing a released one if any.
+
+        Returns:
+            Path to an existing, closed temporary file
+        """
+        try:
+            return self._temp_paths.pop()
+        except IndexError:
+            fd, path = tempfile.mkstemp(suffix='.wav', prefix='voice_input_')
+            os.close(fd)
+            return path
+
+    def release_temp_path(self, path: str) -> None:
+        """
+        Hand back a recording's WAV file once it has been consumed.
+
+        The path is kept for reuse by a later recording; beyond the pool size
+        the file is deleted.
+
+        Args:
+            path: Path returned by a recording method
+        """
+        if len(self._temp_paths) < _TEMP_POOL_SIZE:
+            self._temp_paths.append(path)
+            return
+
+        try:
+            os.remove(path)
+        except OSError as e:
+            self.logger.warning(f"Failed to remove temp file {path}: {e}")
+
+    def _remove_temp_paths(self) -> None:
+        """Delete the pooled temporary files (registered with atexit)."""
+        while self._temp_paths:
+            path = self._temp_paths.pop()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
     def stop_recording(self):
         """Stop the current recording."""
         self.is_recording = False
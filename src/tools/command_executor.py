@@ -2,11 +2,213 @@
 
 import subprocess
 import asyncio
-from typing import Dict, Optional, Literal
+import base64
+import secrets
+from typing import Dict, List, Optional, Literal, Tuple
 import logging
 import time
 import platform
 
+# Bytes requested per read from a process pipe
+_READ_CHUNK_SIZE = 64 * 1024
+
+# Child processes allowed to run at once across one executor
+_MAX_CONCURRENT_PROCESSES = 4
+
+
+def _decode(data: bytes) -> str:
+    """
+    Decode captured process output as UTF-8.
+
+    Args:
+        data: Raw pipe bytes
+
+    Returns:
+        Decoded text; empty output (the usual stderr) skips the decoder
+    """
+    return data.decode('utf-8', errors='replace') if data else ""
+
+
+class PersistentPowerShell:
+    """
+    Long-lived PowerShell process that runs commands one at a time.
+
+    Starting powershell.exe costs several hundred milliseconds per command;
+    this keeps one process reading commands from stdin instead. Each command
+    is followed by sentinels on stdout and stderr carrying a random token, so
+    the output of one command is read up to its sentinel and no further.
+
+    Session state (current directory, variables) carries over between
+    commands, as it would in an interactive console.
+    """
+
+    _ARGS = (
+        "powershell.exe",
+        "-NoLogo",
+        "-NoProfile",
+        "-NonInteractive",
+        "-ExecutionPolicy", "Bypass",
+        "-Command", "-"          # Read commands from stdin
+    )
+
+    def __init__(self, max_output_size: int):
+        """
+        Initialize the persistent shell; the process starts on first use.
+
+        Args:
+            max_output_size: Maximum output size in bytes per stream
+        """
+        self.max_output_size = max_output_size
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._lock = asyncio.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    async def _ensure_started(self) -> asyncio.subprocess.Process:
+        """
+        Return the running process, starting a new one if needed.
+
+        Returns:
+            PowerShell process with piped stdin, stdout and stderr
+        """
+        if self._process is None or self._process.returncode is not None:
+            self._process = await asyncio.create_subprocess_exec(
+                *self._ARGS,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            # Match the UTF-8 decoding of one-shot processes
+            self._process.stdin.write(b"[Console]::OutputEncoding = [Text.Encoding]::UTF8\n")
+            self.logger.info("Started persistent PowerShell process")
+        return self._process
+
+    async def _kill(self) -> None:
+        """Kill the process so the next command starts a fresh one."""
+        process, self._process = self._process, None
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    async def _read_until(self, stream: asyncio.StreamReader, marker: bytes) -> Tuple[bytes, bytes, bool]:
+        """
+        Read a pipe up to a sentinel, keeping at most max_output_size bytes.
+
+        The sentinel is written as marker + payload + ">>>" with no newline,
+        so nothing of it is left in the pipe for the next command.
+
+        Args:
+            stream: Process stdout or stderr
+            marker: Start of the sentinel
+
+        Returns:
+            Tuple of (captured bytes, sentinel payload, whether output was truncated)
+
+        Raises:
+            ConnectionError: If the process exits before writing the sentinel
+        """
+        captured = bytearray()
+        truncated = False
+        pending = b""
+
+        while True:
+            chunk = await stream.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                raise ConnectionError("PowerShell process exited unexpectedly")
+
+            data = pending + chunk
+            start = data.find(marker)
+            if start != -1:
+                end = data.find(b">>>", start)
+                if end == -1:
+                    # Sentinel split across reads; wait for the rest
+                    pending = data
+                    continue
+                body, payload = data[:start], data[start + len(marker):end]
+            else:
+                # Hold back a possible partial marker at the end
+                keep = len(marker) - 1
+                body, pending = data[:-keep], data[-keep:]
+                payload = None
+
+            room = self.max_output_size - len(captured)
+            if room > 0:
+                captured += body[:room]
+            if len(body) > room:
+                truncated = True
+
+            if payload is not None:
+                return bytes(captured), payload, truncated
+
+    async def run(self, command: str, timeout: int) -> Tuple[str, str, bool, bool, int]:
+        """
+        Run one command in the persistent process.
+
+        Args:
+            command: PowerShell command string
+            timeout: Maximum execution time in seconds
+
+        Returns:
+            Tuple of (stdout, stderr, stdout_truncated, stderr_truncated, return_code)
+
+        Raises:
+            OSError: If the process cannot be started
+            asyncio.TimeoutError: If the command exceeds the timeout; the
+                process is killed and replaced on the next call
+        """
+        async with self._lock:
+            process = await self._ensure_started()
+
+            token = secrets.token_hex(8)
+            # Base64 keeps quotes and newlines in the command from breaking
+            # out of the wrapper, which must stay on a single stdin line
+            encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+            # Output is formatted by Out-Default inside the statement, so
+            # Windows PowerShell cannot hold back table output past the
+            # sentinel. Errors are merged in and written to stderr in order;
+            # failures of native commands are left to $LASTEXITCODE.
+            wrapper = (
+                "$global:LASTEXITCODE = 0; $__ok = $true; "
+                "try { & ([scriptblock]::Create([Text.Encoding]::UTF8.GetString("
+                f"[Convert]::FromBase64String('{encoded}')))) 2>&1 | ForEach-Object {{ "
+                "if ($_ -is [Management.Automation.ErrorRecord]) { "
+                "if ($_.FullyQualifiedErrorId -notlike 'NativeCommandError*') { $__ok = $false }; "
+                "[Console]::Error.WriteLine($_) } else { $_ } } | Out-Default } "
+                "catch { $__ok = $false; [Console]::Error.WriteLine($_) }; "
+                "$__code = if ($LASTEXITCODE) { $LASTEXITCODE } elseif ($__ok) { 0 } else { 1 }; "
+                f"[Console]::Out.Write(\"<<<{token}:$__code>>>\"); [Console]::Out.Flush(); "
+                f"[Console]::Error.Write('<<<{token}:>>>'); [Console]::Error.Flush()\n"
+            )
+            marker = f"<<<{token}:".encode("ascii")
+
+            try:
+                process.stdin.write(wrapper.encode("utf-8"))
+                await process.stdin.drain()
+
+                (stdout, code, stdout_truncated), (stderr, _, stderr_truncated) = await asyncio.wait_for(
+                    asyncio.gather(
+                        self._read_until(process.stdout, marker),
+                        self._read_until(process.stderr, marker)
+                    ),
+                    timeout=timeout
+                )
+            except BaseException:
+                # The pipes are out of step with the next command now
+                await self._kill()
+                raise
+
+            return (
+                _decode(stdout),
+                _decode(stderr),
+                stdout_truncated,
+                stderr_truncated,
+                int(code)
+            )
+
+    async def close(self) -> None:
+        """Terminate the process, if running."""
+        async with self._lock:
+            await self._kill()
+
 
 class PowerShellExecutor:
     """
@@ -23,7 +225,8 @@ class PowerShellExecutor:
     def __init__(
         self,
         timeout: int = 30,
-        max_output_size: int = 1024 * 1024  # 1MB
+        max_output_size: int = 1024 * 1024,  # 1MB
+        persistent: bool = False
     ):
         """
         Initialize the PowerShell executor.
@@ -31,11 +234,25 @@ class PowerShellExecutor:
         Args:
             timeout: Maximum execution time in seconds
             max_output_size: Maximum output size in bytes
+            persistent: Run PowerShell commands in one long-lived process
         """
         self.timeout = timeout
         self.max_output_size = max_output_size
         self.logger = logging.getLogger(__name__)
 
+        self._persistent_shell = PersistentPowerShell(max_output_size) if persistent else None
+        # Bounds the number of child processes spawned at once
+        self._spawn_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_PROCESSES)
+
+    # Constant argv prefix for PowerShell (NEVER use shell=True)
+    _POWERSHELL_ARGS = (
+        "powershell.exe",
+        "-NoProfile",           # Don't load profile
+        "-NonInteractive",      # No interactive prompts
+        "-ExecutionPolicy", "Bypass",  # Allow execution
+        "-Command"
+    )
+
     async def execute(self, command: str, timeout: Optional[int] = None) -> Dict:
         """
         Execute PowerShell command securely.
@@ -46,90 +263,92 @@ class PowerShellExecutor:
 
         Returns:
             Dictionary containing:
-            - stdout: Standard output text
-            - stderr: Standard error text
+            - stdout: Standard output text, up to max_output_size bytes
+            - stderr: Standard error text, up to max_output_size bytes
+            - stdout_truncated / stderr_truncated: Whether output was cut off
             - return_code: Process return code
             - execution_time: Time taken in seconds
             - timed_out: Boolean indicating if execution timed out
+            - shell_type: Shell the command ran in
         """
+        if self._persistent_shell is not None:
+            result = await self._run_persistent(command, timeout)
+            if result is not None:
+                return result
 
-        timeout = timeout or self.timeout
+        return await self._run([*self._POWERSHELL_ARGS, command], command, "powershell", timeout)
 
-        # Build command as list (NEVER use shell=True)
-        cmd = [
-            "powershell.exe",
-            "-NoProfile",           # Don't load profile
-            "-NonInteractive",      # No interactive prompts
-            "-ExecutionPolicy", "Bypass",  # Allow execution
-            "-Command", command
-        ]
-
-        self.logger.info(f"Executing: {command}")
-
-        start_time = time.time()
-
-        try:
-            # Run with timeout and capture output
-            # On Windows, encoding parameter may not be supported - decode manually
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+    async def _run_persistent(self, command: str, timeout: Optional[int] = None) -> Optional[Dict]:
+        """
+        Run a command in the persistent PowerShell process.
 
-            # Wait with timeout
-            try:
-                stdout_bytes, stderr_bytes = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=timeout
-                )
-                # Decode manually with error handling
-                stdout = stdout_bytes.decode('utf-8', errors='replace') if stdout_bytes else ""
-                stderr = stderr_bytes.decode('utf-8', errors='replace') if stderr_bytes else ""
-                timed_out = False
-            except asyncio.TimeoutError:
-                process.kill()
-                await process.wait()
-                stdout, stderr = "", f"Command timed out after {timeout} seconds"
-                timed_out = True
-                self.logger.warning(f"Command timed out: {command}")
-
-            execution_time = time.time() - start_time
-
-            # Truncate output if too large
-            if len(stdout) > self.max_output_size:
-                stdout = stdout[:self.max_output_size] + "\n... (output truncated)"
-                self.logger.warning(f"Output truncated (exceeded {self.max_output_size} bytes)")
-
-            if len(stderr) > self.max_output_size:
-                stderr = stderr[:self.max_output_size] + "\n... (error output truncated)"
+        Args:
+            command: PowerShell command string
+            timeout: Override default timeout
 
-            result = {
-                "stdout": stdout,
-                "stderr": stderr,
-                "return_code": process.returncode if not timed_out else -1,
-                "execution_time": execution_time,
-                "timed_out": timed_out
-            }
+        Returns:
+            Dictionary containing execution results, or None if the process
+            could not be started and the command should run one-shot
+        """
+        timeout = timeout or self.timeout
 
-            self.logger.info(
-                f"Execution completed: return_code={result['return_code']}, "
-                f"time={execution_time:.2f}s"
-            )
+        self.logger.info("Executing (powershell, persistent): %s", command)
 
-            return result
+        start_time = time.perf_counter()
 
-        except Exception as e:
-            execution_time = time.time() - start_time
-            self.logger.error(f"Execution failed: {e}")
+        try:
+            stdout, stderr, stdout_truncated, stderr_truncated, return_code = \
+                await self._persistent_shell.run(command, timeout)
+            timed_out = False
+        except asyncio.TimeoutError:
+            stdout, stderr = "", f"Command timed out after {timeout} seconds"
+            stdout_truncated = stderr_truncated = False
+            return_code = -1
+            timed_out = True
+            self.logger.warning(f"Command timed out: {command}")
+        except ConnectionError as e:
+            # The process died mid-command, which may have run partly; rerunning
+            # it one-shot could repeat its side effects, so report the failure
+            execution_time = time.perf_counter() - start_time
+            self.logger.error(f"Execution failed (powershell, persistent): {e}")
             return {
                 "stdout": "",
                 "stderr": str(e),
                 "return_code": -1,
                 "execution_time": execution_time,
                 "timed_out": False,
-                "error": str(e)
+                "error": str(e),
+                "shell_type": "powershell"
             }
+        except OSError as e:
+            self.logger.warning(f"Persistent PowerShell unavailable, running one-shot: {e}")
+            return None
+
+        if stdout_truncated or stderr_truncated:
+            self.logger.warning(f"Output truncated (exceeded {self.max_output_size} bytes)")
+
+        execution_time = time.perf_counter() - start_time
+
+        self.logger.info(
+            "Execution completed (powershell, persistent): return_code=%s, time=%.2fs",
+            return_code, execution_time
+        )
+
+        return {
+            "stdout": stdout,
+            "stderr": stderr,
+            "stdout_truncated": stdout_truncated,
+            "stderr_truncated": stderr_truncated,
+            "return_code": return_code,
+            "execution_time": execution_time,
+            "timed_out": timed_out,
+            "shell_type": "powershell"
+        }
+
+    async def close(self) -> None:
+        """Terminate the persistent PowerShell process, if any."""
+        if self._persistent_shell is not None:
+            await self._persistent_shell.close()
 
     async def execute_cmd(self, command: str, timeout: Optional[int] = None) -> Dict:
         """
@@ -142,86 +361,97 @@ class PowerShellExecutor:
         Returns:
             Dictionary containing execution results
         """
+        return await self._run(["cmd.exe", "/c", command], command, "cmd", timeout)
 
-        timeout = timeout or self.timeout
+    async def execute_bash(self, command: str, timeout: Optional[int] = None) -> Dict:
+        """
+        Execute Bash command securely (for WSL/Git Bash on Windows).
 
-        # Build command as list (NEVER use shell=True)
-        cmd = ["cmd.exe", "/c", command]
+        Args:
+            command: Bash command string
+            timeout: Override default timeout
 
-        self.logger.info(f"Executing (CMD): {command}")
+        Returns:
+            Dictionary containing execution results
+        """
+        # Git Bash on Windows, the system bash elsewhere
+        bash = "bash.exe" if platform.system() == "Windows" else "bash"
+        return await self._run([bash, "-c", command], command, "bash", timeout)
 
-        start_time = time.time()
+    async def _read_capped(self, stream: asyncio.StreamReader) -> Tuple[bytes, bool]:
+        """
+        Read a process pipe to EOF, keeping at most max_output_size bytes.
 
-        try:
-            # Run with timeout and capture output
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+        Data past the cap is read and discarded, so the child never blocks on
+        a full pipe and memory stays bounded however much it writes.
 
-            # Wait with timeout
-            try:
-                stdout_bytes, stderr_bytes = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=timeout
-                )
-                # Decode manually with error handling
-                stdout = stdout_bytes.decode('utf-8', errors='replace') if stdout_bytes else ""
-                stderr = stderr_bytes.decode('utf-8', errors='replace') if stderr_bytes else ""
-                timed_out = False
-            except asyncio.TimeoutError:
-                process.kill()
-                await process.wait()
-                stdout, stderr = "", f"Command timed out after {timeout} seconds"
-                timed_out = True
-                self.logger.warning(f"Command timed out: {command}")
-
-            execution_time = time.time() - start_time
-
-            # Truncate output if too large
-            if len(stdout) > self.max_output_size:
-                stdout = stdout[:self.max_output_size] + "\n... (output truncated)"
-                self.logger.warning(f"Output truncated (exceeded {self.max_output_size} bytes)")
-
-            if len(stderr) > self.max_output_size:
-                stderr = stderr[:self.max_output_size] + "\n... (error output truncated)"
+        Args:
+            stream: Process stdout or stderr
 
-            result = {
-                "stdout": stdout,
-                "stderr": stderr,
-                "return_code": process.returncode if not timed_out else -1,
-                "execution_time": execution_time,
-                "timed_out": timed_out,
-                "shell_type": "cmd"
-            }
+        Returns:
+            Tuple of (captured bytes, whether output was truncated)
+        """
+        captured = bytearray()
+        truncated = False
 
-            self.logger.info(
-                f"CMD execution completed: return_code={result['return_code']}, "
-                f"time={execution_time:.2f}s"
-            )
+        while True:
+            chunk = await stream.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                break
 
-            return result
+            room = self.max_output_size - len(captured)
+            if room > 0:
+                captured += chunk[:room]
+            if len(chunk) > room:
+                truncated = True
 
-        except Exception as e:
-            execution_time = time.time() - start_time
-            self.logger.error(f"CMD execution failed: {e}")
-            return {
-                "stdout": "",
-                "stderr": str(e),
-                "return_code": -1,
-                "execution_time": execution_time,
-                "timed_out": False,
-                "error": str(e),
-                "shell_type": "cmd"
-            }
+        return bytes(captured), truncated
 
-    async def execute_bash(self, command: str, timeout: Optional[int] = None) -> Dict:
+    async def _collect_output(
+        self,
+        process: asyncio.subprocess.Process
+    ) -> Tuple[str, str, bool, bool]:
         """
-        Execute Bash command securely (for WSL/Git Bash on Windows).
+        Read both pipes of a process concurrently and wait for it to exit.
+
+        Truncated text is returned as is with a flag; the marker is added only
+        when displayed, so the captured prefix is never copied again.
 
         Args:
-            command: Bash command string
+            process: Process started with piped stdout and stderr
+
+        Returns:
+            Tuple of (stdout, stderr, stdout_truncated, stderr_truncated)
+        """
+        (stdout_bytes, stdout_truncated), (stderr_bytes, stderr_truncated) = await asyncio.gather(
+            self._read_capped(process.stdout),
+            self._read_capped(process.stderr)
+        )
+        await process.wait()
+
+        # Decode manually with error handling
+        stdout = _decode(stdout_bytes)
+        stderr = _decode(stderr_bytes)
+
+        if stdout_truncated or stderr_truncated:
+            self.logger.warning(f"Output truncated (exceeded {self.max_output_size} bytes)")
+
+        return stdout, stderr, stdout_truncated, stderr_truncated
+
+    async def _run(
+        self,
+        argv: List[str],
+        command: str,
+        shell_type: str,
+        timeout: Optional[int] = None
+    ) -> Dict:
+        """
+        Run a prepared argument list and collect its results.
+
+        Args:
+            argv: Program and arguments (NEVER run through a shell)
+            command: Original command string, for logging
+            shell_type: "powershell", "cmd", or "bash"
             timeout: Override default timeout
 
         Returns:
@@ -230,71 +460,58 @@ class PowerShellExecutor:
 
         timeout = timeout or self.timeout
 
-        # Try bash.exe (Git Bash) or wsl.exe (WSL)
-        bash_cmd = None
-        if platform.system() == "Windows":
-            # Try Git Bash first, then WSL
-            bash_cmd = ["bash.exe", "-c", command]
-        else:
-            bash_cmd = ["bash", "-c", command]
-
-        self.logger.info(f"Executing (Bash): {command}")
+        self.logger.info("Executing (%s): %s", shell_type, command)
 
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
-            # Run with timeout and capture output
-            process = await asyncio.create_subprocess_exec(
-                *bash_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            # Wait with timeout
-            try:
-                stdout_bytes, stderr_bytes = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=timeout
+            async with self._spawn_semaphore:
+                # Run with timeout and capture output
+                # On Windows, encoding parameter may not be supported - decode manually
+                process = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
                 )
-                # Decode manually with error handling
-                stdout = stdout_bytes.decode('utf-8', errors='replace') if stdout_bytes else ""
-                stderr = stderr_bytes.decode('utf-8', errors='replace') if stderr_bytes else ""
-                timed_out = False
-            except asyncio.TimeoutError:
-                process.kill()
-                await process.wait()
-                stdout, stderr = "", f"Command timed out after {timeout} seconds"
-                timed_out = True
-                self.logger.warning(f"Command timed out: {command}")
-
-            execution_time = time.time() - start_time
-
-            # Truncate output if too large
-            if len(stdout) > self.max_output_size:
-                stdout = stdout[:self.max_output_size] + "\n... (output truncated)"
-
-            if len(stderr) > self.max_output_size:
-                stderr = stderr[:self.max_output_size] + "\n... (error output truncated)"
+
+                # Wait with timeout
+                try:
+                    stdout, stderr, stdout_truncated, stderr_truncated = await asyncio.wait_for(
+                        self._collect_output(process),
+                        timeout=timeout
+                    )
+                    timed_out = False
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    stdout, stderr = "", f"Command timed out after {timeout} seconds"
+                    stdout_truncated = stderr_truncated = False
+                    timed_out = True
+                    self.logger.warning(f"Command timed out: {command}")
+
+            execution_time = time.perf_counter() - start_time
 
             result = {
                 "stdout": stdout,
                 "stderr": stderr,
+                "stdout_truncated": stdout_truncated,
+                "stderr_truncated": stderr_truncated,
                 "return_code": process.returncode if not timed_out else -1,
                 "execution_time": execution_time,
                 "timed_out": timed_out,
-                "shell_type": "bash"
+                "shell_type": shell_type
             }
 
             self.logger.info(
-                f"Bash execution completed: return_code={result['return_code']}, "
-                f"time={execution_time:.2f}s"
+                "Execution completed (%s): return_code=%s, time=%.2fs",
+                shell_type, result["return_code"], execution_time
             )
 
             return result
 
         except Exception as e:
-            execution_time = time.time() - start_time
-            self.logger.error(f"Bash execution failed: {e}")
+            execution_time = time.perf_counter() - start_time
+            self.logger.error(f"Execution failed ({shell_type}): {e}")
             return {
                 "stdout": "",
                 "stderr": str(e),
@@ -302,5 +519,5 @@ class PowerShellExecutor:
                 "execution_time": execution_time,
                 "timed_out": False,
                 "error": str(e),
-                "shell_type": "bash"
+                "shell_type": shell_type
             }
@@ -1,10 +1,31 @@
 """Generates PowerShell commands from natural language using OpenAI."""
 
-from openai import AsyncOpenAI
-from typing import Dict, Optional
+from typing import Dict, List, Literal, Optional
 import json
 import logging
 
+from openai import BadRequestError
+from pydantic import BaseModel
+
+from prompts.command_generation import SYSTEM_PROMPT, get_generation_prompt
+from tools.openai_client import get_openai_client, structured_outputs_unsupported
+
+# The system message never changes, so one dict is shared by every request
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Output cap for the JSON response; leaves room for multi-line scripts
+_MAX_TOKENS = 800
+
+
+class GeneratedCommand(BaseModel):
+    """Structured output schema of a command generation response."""
+
+    command: str
+    explanation: str
+    safety_level: Literal["safe", "caution", "dangerous"]
+    warnings: List[str]
+    assumptions: List[str]
+
 
 class CommandGenerator:
     """
@@ -20,11 +41,15 @@ class CommandGenerator:
             model: Model to use (default: gpt-4o)
             temperature: Sampling temperature (default: 0.3 for consistency)
         """
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
         self.model = model
         self.temperature = temperature
         self.logger = logging.getLogger(__name__)
 
+        # Cleared when the model rejects structured outputs; JSON mode is
+        # used from then on
+        self._structured_outputs = True
+
     async def generate(self, user_input: str, context: Optional[Dict] = None) -> Dict:
         """
         Generate PowerShell command with explanation.
@@ -42,14 +67,12 @@ class CommandGenerator:
             - assumptions: List of assumptions made
         """
 
-        from prompts.command_generation import get_generation_prompt
-
         prompt = get_generation_prompt(user_input, context)
 
         self.logger.info(f"Generating command for: {user_input}")
 
         # Build messages list
-        messages = [{"role": "system", "content": prompt["system"]}]
+        messages = [_SYSTEM_MESSAGE]
 
         # Add conversation history if provided
         if context and context.get("conversation_messages"):
@@ -62,14 +85,19 @@ class CommandGenerator:
         messages.append({"role": "user", "content": prompt["user"]})
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                response_format={"type": "json_object"},
-                temperature=self.temperature
-            )
-
-            result = json.loads(response.choices[0].message.content)
+            result = None
+            if self._structured_outputs:
+                result = await self._generate_structured(messages)
+            if result is None:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    temperature=self.temperature,
+                    max_tokens=_MAX_TOKENS
+                )
+
+                result = json.loads(response.choices[0].message.content)
 
             self.logger.info(f"Generated command: {result.get('command')}")
             self.logger.debug(f"Full response: {result}")
@@ -83,3 +111,42 @@ class CommandGenerator:
         except Exception as e:
             self.logger.error(f"Command generation failed: {e}")
             raise
+
+    async def _generate_structured(self, messages: List[Dict]) -> Optional[Dict]:
+        """
+        Request the response as a GeneratedCommand via structured outputs.
+
+        The SDK validates the response against the schema while parsing it,
+        so every field is present and no separate json.loads() is needed.
+
+        Args:
+            messages: Chat messages for the request
+
+        Returns:
+            Generated command dictionary, or None if the model does not
+            support structured outputs
+
+        Raises:
+            ValueError: If the model refused the request
+            BadRequestError: If the request was rejected for another reason
+        """
+        try:
+            response = await self.client.beta.chat.completions.parse(
+                model=self.model,
+                messages=messages,
+                response_format=GeneratedCommand,
+                temperature=self.temperature,
+                max_tokens=_MAX_TOKENS
+            )
+        except BadRequestError as e:
+            if not structured_outputs_unsupported(e):
+                raise
+            self.logger.warning(f"Structured outputs unavailable for {self.model}, using JSON mode: {e}")
+            self._structured_outputs = False
+            return None
+
+        message = response.choices[0].message
+        if message.parsed is None:
+            raise ValueError(f"OpenAI refused the request: {message.refusal}")
+
+        return message.parsed.model_dump()
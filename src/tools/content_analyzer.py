@@ -1,12 +1,259 @@
 """LLM-based content analyzer for understanding files, code, and output."""
 
+import asyncio
+from functools import lru_cache
+import json
 import logging
-from typing import Dict, Any, Optional, List
-from openai import AsyncOpenAI
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, TypedDict
+
+from tools.openai_client import get_openai_client
+from utils.result_cache import ResultCache, hash_key
+from utils.semantic_cache import SemanticCache
+
+# tiktoken is optional (installed with langchain-openai): it counts prompt
+# tokens locally; without it counts are estimated from the text length
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
 
+class FileAnalysis(TypedDict):
+    """Result of analyze_file(); kept a plain dict so graph state stays checkpointable."""
+
+    file_path: str
+    analysis_type: str
+    analysis: str
+    tokens_used: int
+
+
+# Maximum number of content characters sent to the LLM by analyze_file
+MAX_FILE_CHARS = 10000
+
+# Characters sent by the other analyses: command output, each compared
+# file, and content asked about
+_OUTPUT_CHARS = 5000
+_COMPARE_CHARS = 5000
+_INSIGHTS_CHARS = 8000
+
+# Completions keyed by their full LLM input; see ContentAnalyzer._complete()
+_completion_cache = ResultCache(maxsize=128, ttl=3600)
+
+# Above this temperature answers are meant to vary and are not cached
+_MAX_CACHED_TEMPERATURE = 0.3
+
+# Analysis kinds (the analysis_type of the result) light enough for a
+# smaller model: reading command output or answering a question about given
+# content does not need the main one. See ContentAnalyzer's model_map.
+LIGHT_ANALYSIS_KINDS = ("output", "question_answer", "comparison", "purpose")
+
+# Output caps per analysis kind; short interpretations get less room than
+# full file, comparison and repository write-ups
+_MAX_TOKENS = {
+    "output": 600,
+    "question_answer": 600
+}
+_DEFAULT_MAX_TOKENS = 1200
+
+# Embedding model used to match paraphrased questions
+_EMBEDDING_MODEL = "text-embedding-3-small"
+
+# System prompts carry every fixed instruction, and user prompts only the
+# request data appended after them. OpenAI caches repeated prompt prefixes,
+# so keeping these byte-identical between calls makes them cache hits.
+_FILE_ANALYSIS_PROMPTS = {
+    "purpose": """You are a code and document analyzer. Analyze the given file content
+and explain its purpose, what it does, and its key components.
+
+Provide:
+1. **Purpose**: What is this file for?
+2. **Key Components**: Main functions, classes, or sections
+3. **Dependencies**: What does it rely on?
+4. **Summary**: Brief overview in 2-3 sentences""",
+
+    "security": """You are a security analyst. Review the given content for
+potential security issues, vulnerabilities, and best practice violations.
+
+Identify:
+1. **Security Issues**: Potential vulnerabilities
+2. **Risky Patterns**: Dangerous code patterns
+3. **Recommendations**: How to fix issues
+4. **Risk Level**: LOW/MEDIUM/HIGH""",
+
+    "explain": """You are a technical educator. Explain the given code or document
+in a clear, understandable way for someone learning.
+
+Provide an easy-to-understand explanation covering:
+1. What it does
+2. How it works
+3. Important concepts
+4. Example usage (if applicable)""",
+
+    "general": """You are a content analyzer. Analyze the given content and
+provide useful insights, summaries, and observations.
+
+Provide a comprehensive analysis."""
+}
+
+_REPOSITORY_PROMPT = """You are a software architect analyzing code repositories.
+
+Analyze the given repository structure and provide:
+1. **Project Type**: What kind of project is this?
+2. **Technology Stack**: Languages, frameworks, tools used
+3. **Architecture**: How is the code organized?
+4. **Purpose**: What does this project do?
+5. **Entry Points**: Main files or scripts to start with
+6. **Dependencies**: Key dependencies identified from structure"""
+
+_OUTPUT_PROMPT = """You are a helpful assistant that explains command output in plain language.
+
+Given what the user wanted, the command executed and its output, explain:
+1. **What the output shows**: Interpret the results
+2. **Key findings**: Important information from the output
+3. **Answer to user's question**: Direct answer to what they wanted
+4. **Next steps**: Suggestions (if applicable)"""
+
+_COMPARISON_PROMPT = """You are a file comparison expert.
+
+Compare the two given files and provide:
+1. **Key Differences**: What's different between them?
+2. **Similarities**: What's the same?
+3. **Purpose Comparison**: How do their purposes differ?
+4. **Recommendation**: When to use which?"""
+
+_INSIGHTS_PROMPT = """You are a helpful assistant that answers questions about provided content.
+
+Provide a detailed answer to the question based on the given content."""
+
+# User prompt of a file analysis, shared by every analysis type
+_FILE_USER_TEMPLATE = """File: {file_path}
+
+Content:
+```
+{snippet}
+```"""
+
+_OUTPUT_USER_TEMPLATE = """The user wanted: "{user_intent}"
+
+Command executed: {command}
+
+Output:
+```
+{output}
+```"""
+
+_INSIGHTS_USER_TEMPLATE = """Content:
+```
+{snippet}
+```
+
+Question: {question}"""
+
+# Files listed in a repository analysis; the folded tree costs a fraction of
+# the tokens of full paths, so more of them fit the same budget
+_REPO_MAX_FILES = 200
+
+_PATH_SEP_RE = re.compile(r"[\\/]+")
+
+# Simultaneous requests made by analyze_files_concurrent()
+_DEFAULT_CONCURRENCY = 20
+
+# Batch API polling: first wait and cap, in seconds
+_BATCH_POLL_INITIAL = 5.0
+_BATCH_POLL_MAX = 300.0
+_BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+@lru_cache(maxsize=None)
+def _encoding_for(model: str):
+    """Return the tiktoken encoding of a model, loaded once per model."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _count_tokens(model: str, *texts: str) -> int:
+    """
+    Count the tokens of texts as the model would see them.
+
+    Args:
+        model: Model name
+        texts: Texts to count
+
+    Returns:
+        Token count, estimated at 4 characters per token without tiktoken
+    """
+    if not TIKTOKEN_AVAILABLE:
+        return sum(len(text) for text in texts) // 4
+    encoding = _encoding_for(model)
+    return sum(len(encoding.encode(text)) for text in texts)
+
+
+def _render_file_tree(paths: List[str]) -> str:
+    """
+    Render file paths as an indented tree, naming each directory once.
+
+    Chains of directories holding a single subdirectory are folded into one
+    line (e.g. "src/main/java/").
+
+    Args:
+        paths: File paths, with / or \\ separators
+
+    Returns:
+        Tree text, one entry per line
+    """
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        for part in _PATH_SEP_RE.split(path.strip("\\/")):
+            node = node.setdefault(part, {})
+
+    lines: List[str] = []
+
+    def render(node: Dict[str, Any], depth: int) -> None:
+        for name, children in node.items():
+            if not children:
+                lines.append("  " * depth + name)
+                continue
+            # Fold directories whose only entry is another directory
+            while len(children) == 1:
+                child_name, grandchildren = next(iter(children.items()))
+                if not grandchildren:
+                    break
+                name, children = f"{name}/{child_name}", grandchildren
+            lines.append("  " * depth + name + "/")
+            render(children, depth + 1)
+
+    render(tree, 0)
+    return "\n".join(lines)
+
+
+def _file_analysis_prompts(file_path: str, content: str, analysis_type: str) -> Tuple[str, str]:
+    """
+    Build the (system, user) prompt pair for a file analysis.
+
+    Instructions live in the system prompt and the file is appended last, so
+    the static prefix is identical across requests.
+
+    Args:
+        file_path: Path to the file
+        content: File content
+        analysis_type: Type of analysis (general, purpose, security, etc.)
+
+    Returns:
+        Tuple of (system prompt, user prompt)
+    """
+    system_prompt = _FILE_ANALYSIS_PROMPTS.get(analysis_type, _FILE_ANALYSIS_PROMPTS["general"])
+    user_prompt = _FILE_USER_TEMPLATE.format(file_path=file_path, snippet=content[:MAX_FILE_CHARS])
+    return system_prompt, user_prompt
+
+
 class ContentAnalyzer:
     """
     Analyzes content using LLM to provide insights, explanations, and summaries.
@@ -22,7 +269,9 @@ class ContentAnalyzer:
         self,
         api_key: str,
         model: str = "gpt-4o",
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        semantic_cache: bool = False,
+        model_map: Optional[Dict[str, str]] = None
     ):
         """
         Initialize content analyzer.
@@ -31,18 +280,170 @@ class ContentAnalyzer:
             api_key: OpenAI API key
             model: Model to use for analysis
             temperature: Temperature for generation
+            semantic_cache: Answer paraphrased extract_insights() questions
+                about the same content from cache
+            model_map: Model per analysis kind ("output", "question_answer",
+                "comparison", "repository", or a file analysis_type),
+                overriding model for the kinds listed; by default every
+                kind uses model
         """
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
         self.model = model
+        self.model_map = model_map or {}
         self.temperature = temperature
         self.logger = logging.getLogger(__name__)
+        self._semantic_cache = SemanticCache() if semantic_cache else None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        """
+        Embed text for semantic cache lookups.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Unit-length embedding, or None if the request failed
+        """
+        try:
+            response = await self.client.embeddings.create(model=_EMBEDDING_MODEL, input=text)
+            return response.data[0].embedding
+        except Exception as e:
+            self.logger.warning(f"Embedding failed, skipping semantic cache: {e}")
+            return None
+
+    def _model_for(self, kind: str) -> str:
+        """Return the model used for an analysis kind."""
+        return self.model_map.get(kind, self.model)
+
+    async def _complete(self, kind: str, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        """
+        Run a chat completion, reusing the result of an identical request,
+        whether finished or still in flight.
+
+        Args:
+            kind: Analysis kind, selecting the model
+            system_prompt: System message content
+            user_prompt: User message content
+
+        Returns:
+            Dictionary containing:
+            - text: Stripped response text
+            - tokens_used: Total tokens of the request that produced it
+        """
+        model = self._model_for(kind)
+        max_tokens = _MAX_TOKENS.get(kind, _DEFAULT_MAX_TOKENS)
+        if self.temperature > _MAX_CACHED_TEMPERATURE:
+            return await self._request_completion(model, max_tokens, system_prompt, user_prompt)
+
+        cache_key = hash_key(model, self.temperature, system_prompt, user_prompt)
+        cached = _completion_cache.get(cache_key)
+        if cached is not None:
+            self.logger.info("Reusing cached analysis")
+            return cached
+
+        # An identical request already under way is awaited instead of
+        # being sent again
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._request_completion(model, max_tokens, system_prompt, user_prompt))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        else:
+            self.logger.info("Joining identical in-flight analysis")
+
+        # Shielded so one caller being cancelled does not cancel the others
+        completion = await asyncio.shield(task)
+        _completion_cache.put(cache_key, completion)
+        return completion
+
+    async def _request_completion(
+        self,
+        model: str,
+        max_tokens: int,
+        system_prompt: str,
+        user_prompt: str
+    ) -> Dict[str, Any]:
+        """
+        Send a chat completion request.
+
+        Args:
+            model: Model to use
+            max_tokens: Maximum tokens to generate
+            system_prompt: System message content
+            user_prompt: User message content
+
+        Returns:
+            Dictionary with the response text and total tokens used
+        """
+        response = await self.client.chat.completions.create(
+            model=model,
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+
+        return {
+            "text": response.choices[0].message.content.strip(),
+            "tokens_used": response.usage.total_tokens if response.usage else 0
+        }
+
+    async def _stream_completion(self, kind: str, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding text as it arrives.
+
+        Streamed responses bypass the result cache. Stopping iteration early
+        closes the response, so no further tokens are generated or paid for.
+
+        Streams carry no usage totals, so tokens are accounted locally: the
+        prompt is counted before sending and each content delta counts as
+        one output token. The total is logged when the stream ends, even if
+        it was stopped early.
+
+        Args:
+            kind: Analysis kind, selecting the model and output cap
+            system_prompt: System message content
+            user_prompt: User message content
+
+        Yields:
+            Response text fragments
+        """
+        model = self._model_for(kind)
+        input_tokens = _count_tokens(model, system_prompt, user_prompt)
+        output_tokens = 0
+
+        stream = await self.client.chat.completions.create(
+            model=model,
+            temperature=self.temperature,
+            max_tokens=_MAX_TOKENS.get(kind, _DEFAULT_MAX_TOKENS),
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            stream=True
+        )
+
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    output_tokens += 1
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+            self.logger.debug(
+                "Streamed %s analysis used ~%d tokens (%d in, %d out)",
+                kind, input_tokens + output_tokens, input_tokens, output_tokens
+            )
 
     async def analyze_file(
         self,
         file_path: str,
         content: str,
         analysis_type: str = "general"
-    ) -> Dict[str, Any]:
+    ) -> FileAnalysis:
         """
         Analyze file content and provide insights.
 
@@ -57,90 +458,144 @@ class ContentAnalyzer:
 
         self.logger.info(f"Analyzing file: {file_path} (type: {analysis_type})")
 
-        # Build analysis prompt based on type
-        if analysis_type == "purpose":
-            system_prompt = """You are a code and document analyzer. Analyze the given file content
-and explain its purpose, what it does, and its key components."""
-            user_prompt = f"""Analyze this file: {file_path}
+        system_prompt, user_prompt = _file_analysis_prompts(file_path, content, analysis_type)
 
-Content:
-```
-{content[:10000]}  # Limit to first 10K chars
-```
+        try:
+            completion = await self._complete(analysis_type, system_prompt, user_prompt)
 
-Provide:
-1. **Purpose**: What is this file for?
-2. **Key Components**: Main functions, classes, or sections
-3. **Dependencies**: What does it rely on?
-4. **Summary**: Brief overview in 2-3 sentences"""
+            return FileAnalysis(
+                file_path=file_path,
+                analysis_type=analysis_type,
+                analysis=completion["text"],
+                tokens_used=completion["tokens_used"]
+            )
 
-        elif analysis_type == "security":
-            system_prompt = """You are a security analyst. Review the given content for
-potential security issues, vulnerabilities, and best practice violations."""
-            user_prompt = f"""Security review of: {file_path}
+        except Exception as e:
+            self.logger.error(f"Analysis failed: {e}")
+            raise
 
-Content:
-```
-{content[:10000]}
-```
+    async def analyze_files_concurrent(
+        self,
+        items: List[Tuple[str, str, str]],
+        concurrency: int = _DEFAULT_CONCURRENCY
+    ) -> List[Any]:
+        """
+        Analyze many files at once, with at most concurrency requests in flight.
 
-Identify:
-1. **Security Issues**: Potential vulnerabilities
-2. **Risky Patterns**: Dangerous code patterns
-3. **Recommendations**: How to fix issues
-4. **Risk Level**: LOW/MEDIUM/HIGH"""
+        Args:
+            items: List of (file_path, content, analysis_type) tuples
+            concurrency: Maximum simultaneous API requests
 
-        elif analysis_type == "explain":
-            system_prompt = """You are a technical educator. Explain the given code or document
-in a clear, understandable way for someone learning."""
-            user_prompt = f"""Explain this file: {file_path}
+        Returns:
+            List in the order of items holding each analysis dictionary,
+            or the exception raised for that file
+        """
+        semaphore = asyncio.Semaphore(concurrency)
 
-Content:
-```
-{content[:10000]}
-```
+        async def analyze_one(file_path: str, content: str, analysis_type: str) -> FileAnalysis:
+            async with semaphore:
+                return await self.analyze_file(file_path, content, analysis_type)
 
-Provide an easy-to-understand explanation covering:
-1. What it does
-2. How it works
-3. Important concepts
-4. Example usage (if applicable)"""
+        return await asyncio.gather(
+            *(analyze_one(*item) for item in items),
+            return_exceptions=True
+        )
 
-        else:  # general
-            system_prompt = """You are a content analyzer. Analyze the given content and
-provide useful insights, summaries, and observations."""
-            user_prompt = f"""Analyze: {file_path}
+    async def batch_analyze_files(
+        self,
+        items: List[Tuple[str, str, str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many files through the OpenAI Batch API.
 
-Content:
-```
-{content[:10000]}
-```
+        Batch requests cost half as much as synchronous ones but may take up
+        to 24 hours, so this is meant for non-interactive workloads.
 
-Provide a comprehensive analysis."""
+        Args:
+            items: List of (file_path, content, analysis_type) tuples
+
+        Returns:
+            List of analysis dictionaries in the order of items; entries
+            that failed contain an "error" key instead of "analysis"
+
+        Raises:
+            RuntimeError: If the batch ends without producing results
+        """
+
+        if not items:
+            return []
+
+        self.logger.info(f"Submitting batch analysis of {len(items)} files")
+
+        # custom_id is the item index: paths may repeat, and the output file
+        # is not in input order
+        lines = []
+        for index, (file_path, content, analysis_type) in enumerate(items):
+            system_prompt, user_prompt = _file_analysis_prompts(file_path, content, analysis_type)
+            lines.append(json.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self._model_for(analysis_type),
+                    "temperature": self.temperature,
+                    "max_tokens": _MAX_TOKENS.get(analysis_type, _DEFAULT_MAX_TOKENS),
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ]
+                }
+            }))
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                temperature=self.temperature,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
+            input_file = await self.client.files.create(
+                file=("analysis_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
             )
 
-            analysis = response.choices[0].message.content.strip()
+            # Poll with exponential backoff until the batch settles
+            delay = _BATCH_POLL_INITIAL
+            while batch.status not in _BATCH_FINAL_STATUSES:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _BATCH_POLL_MAX)
+                batch = await self.client.batches.retrieve(batch.id)
 
-            return {
-                "file_path": file_path,
-                "analysis_type": analysis_type,
-                "analysis": analysis,
-                "tokens_used": response.usage.total_tokens if response.usage else 0
-            }
+            if not batch.output_file_id:
+                raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+
+            output = await self.client.files.content(batch.output_file_id)
 
         except Exception as e:
-            self.logger.error(f"Analysis failed: {e}")
+            self.logger.error(f"Batch analysis failed: {e}")
             raise
 
+        results: List[Dict[str, Any]] = [
+            {"file_path": file_path, "analysis_type": analysis_type, "error": "No result returned"}
+            for file_path, _, analysis_type in items
+        ]
+        for line in output.text.splitlines():
+            if not line:
+                continue
+            record = json.loads(line)
+            result = results[int(record["custom_id"])]
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                result["error"] = str(record.get("error") or response.get("body"))
+                continue
+
+            body = response["body"]
+            del result["error"]
+            result["analysis"] = body["choices"][0]["message"]["content"].strip()
+            result["tokens_used"] = (body.get("usage") or {}).get("total_tokens", 0)
+
+        self.logger.info(f"Batch {batch.id} finished with status {batch.status}")
+        return results
+
     async def analyze_code_repository(
         self,
         repo_path: str,
@@ -161,11 +616,9 @@ Provide a comprehensive analysis."""
 
         self.logger.info(f"Analyzing repository: {repo_path}")
 
-        file_tree = "\n".join(file_list[:100])  # First 100 files
+        file_tree = _render_file_tree(file_list[:_REPO_MAX_FILES])
 
-        user_prompt = f"""Analyze this code repository structure:
-
-Repository: {repo_path}
+        user_prompt = f"""Repository: {repo_path}
 
 File Structure:
 ```
@@ -175,30 +628,11 @@ File Structure:
 README:
 ```
 {readme_content[:2000] if readme_content else "No README found"}
-```
-
-Provide:
-1. **Project Type**: What kind of project is this?
-2. **Technology Stack**: Languages, frameworks, tools used
-3. **Architecture**: How is the code organized?
-4. **Purpose**: What does this project do?
-5. **Entry Points**: Main files or scripts to start with
-6. **Dependencies**: Key dependencies identified from structure"""
+```"""
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                temperature=self.temperature,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a software architect analyzing code repositories."
-                    },
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-
-            analysis = response.choices[0].message.content.strip()
+            completion = await self._complete("repository", _REPOSITORY_PROMPT, user_prompt)
+            analysis = completion["text"]
 
             return {
                 "repo_path": repo_path,
@@ -231,35 +665,13 @@ Provide:
 
         self.logger.info(f"Analyzing output of command: {command}")
 
-        user_prompt = f"""The user wanted: "{user_intent}"
-
-Command executed: {command}
-
-Output:
-```
-{output[:5000]}
-```
-
-Explain:
-1. **What the output shows**: Interpret the results
-2. **Key findings**: Important information from the output
-3. **Answer to user's question**: Direct answer to what they wanted
-4. **Next steps**: Suggestions (if applicable)"""
+        user_prompt = _OUTPUT_USER_TEMPLATE.format(
+            user_intent=user_intent, command=command, output=output[:_OUTPUT_CHARS]
+        )
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                temperature=self.temperature,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that explains command output in plain language."
-                    },
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-
-            analysis = response.choices[0].message.content.strip()
+            completion = await self._complete("output", _OUTPUT_PROMPT, user_prompt)
+            analysis = completion["text"]
 
             return {
                 "command": command,
@@ -271,6 +683,36 @@ Explain:
             self.logger.error(f"Output analysis failed: {e}")
             raise
 
+    async def analyze_command_output_stream(
+        self,
+        command: str,
+        output: str,
+        user_intent: str
+    ) -> AsyncIterator[str]:
+        """
+        Stream the explanation of command output as it is generated.
+
+        Interactive callers can show the first words within a few hundred
+        milliseconds, and stop early by breaking out of the loop. Use
+        analyze_command_output() for a cached, complete result.
+
+        Args:
+            command: The command that was executed
+            output: Command output
+            user_intent: Original user request
+
+        Yields:
+            Explanation text fragments
+        """
+
+        self.logger.info(f"Streaming analysis of command output: {command}")
+
+        user_prompt = _OUTPUT_USER_TEMPLATE.format(
+            user_intent=user_intent, command=command, output=output[:_OUTPUT_CHARS]
+        )
+        async for fragment in self._stream_completion("output", _OUTPUT_PROMPT, user_prompt):
+            yield fragment
+
     async def compare_files(
         self,
         file1_path: str,
@@ -293,38 +735,19 @@ Explain:
 
         self.logger.info(f"Comparing {file1_path} vs {file2_path}")
 
-        user_prompt = f"""Compare these two files:
-
-File 1: {file1_path}
+        user_prompt = f"""File 1: {file1_path}
 ```
-{file1_content[:5000]}
+{file1_content[:_COMPARE_CHARS]}
 ```
 
 File 2: {file2_path}
 ```
-{file2_content[:5000]}
-```
-
-Provide:
-1. **Key Differences**: What's different between them?
-2. **Similarities**: What's the same?
-3. **Purpose Comparison**: How do their purposes differ?
-4. **Recommendation**: When to use which?"""
+{file2_content[:_COMPARE_CHARS]}
+```"""
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                temperature=self.temperature,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a file comparison expert."
-                    },
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-
-            analysis = response.choices[0].message.content.strip()
+            completion = await self._complete("comparison", _COMPARISON_PROMPT, user_prompt)
+            analysis = completion["text"]
 
             return {
                 "file1": file1_path,
@@ -355,36 +778,53 @@ Provide:
 
         self.logger.info(f"Extracting insights for question: {question}")
 
-        user_prompt = f"""Content:
-```
-{content[:8000]}
-```
+        # Slice once; the prefix is both hashed and sent
+        snippet = content[:_INSIGHTS_CHARS]
 
-Question: {question}
+        # Paraphrases only match questions about the exact same content
+        embedding = None
+        if self._semantic_cache is not None:
+            scope = hash_key(self._model_for("question_answer"), snippet)
+            embedding = await self._embed(question)
+            if embedding is not None:
+                cached = self._semantic_cache.lookup(scope, embedding)
+                if cached is not None:
+                    self.logger.info("Reusing cached answer to a similar question")
+                    return {**cached, "question": question}
 
-Provide a detailed answer based on the content above."""
+        user_prompt = _INSIGHTS_USER_TEMPLATE.format(snippet=snippet, question=question)
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                temperature=self.temperature,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that answers questions about provided content."
-                    },
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-
-            answer = response.choices[0].message.content.strip()
+            completion = await self._complete("question_answer", _INSIGHTS_PROMPT, user_prompt)
+            answer = completion["text"]
 
-            return {
+            result = {
                 "question": question,
                 "analysis_type": "question_answer",
                 "analysis": answer
             }
+            if embedding is not None:
+                self._semantic_cache.add(scope, embedding, result)
+            return result
 
         except Exception as e:
             self.logger.error(f"Insight extraction failed: {e}")
             raise
+
+    async def extract_insights_stream(self, content: str, question: str) -> AsyncIterator[str]:
+        """
+        Stream the answer to a question about content as it is generated.
+
+        Args:
+            content: The content to analyze
+            question: Specific question to answer
+
+        Yields:
+            Answer text fragments
+        """
+
+        self.logger.info(f"Streaming insights for question: {question}")
+
+        user_prompt = _INSIGHTS_USER_TEMPLATE.format(snippet=content[:_INSIGHTS_CHARS], question=question)
+        async for fragment in self._stream_completion("question_answer", _INSIGHTS_PROMPT, user_prompt):
+            yield fragment
@@ -1,11 +1,212 @@
 """Intelligent failure analyzer that uses LLM to understand and fix command failures."""
 
+import json
 import logging
-from typing import Dict, Any, Optional, List
-from openai import AsyncOpenAI
+import re
+from typing import Dict, Any, Optional, List, Literal, Type
+
+from openai import BadRequestError
+from pydantic import BaseModel
+
+from tools.openai_client import get_openai_client, structured_outputs_unsupported
+from utils.result_cache import ResultCache, hash_key
+
+# orjson is optional: it parses the JSON responses faster than the stdlib
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Output cap for the JSON analyses, which are short fixed-field objects
+_MAX_TOKENS = 400
+
+_Confidence = Literal["low", "medium", "high"]
+
+
+class FailureAnalysis(BaseModel):
+    """Structured output schema of analyze_failure()."""
+
+    failure_reason: str
+    root_cause: Literal[
+        "syntax_error", "permission_denied", "file_not_found", "invalid_argument",
+        "path_issue", "command_not_found", "other"
+    ]
+    corrected_command: Optional[str]
+    explanation: str
+    confidence: _Confidence
+    should_retry: bool
+    alternative_approaches: List[str]
+
+
+class TimeoutAnalysis(BaseModel):
+    """Structured output schema of analyze_execution_timeout()."""
+
+    failure_reason: str
+    root_cause: Literal["performance_issue"]
+    corrected_command: Optional[str]
+    explanation: str
+    confidence: _Confidence
+    should_retry: bool
+
+
+class AlternativeApproach(BaseModel):
+    """Structured output schema of suggest_alternative_approach()."""
+
+    failure_reason: str
+    alternative_approach: str
+    corrected_command: Optional[str]
+    explanation: str
+    confidence: _Confidence
+    should_retry: bool
+
+
+# Keywords looked for by categorize_error(), each group named after what it
+# signals. The lookahead makes the scan test every position, so keywords
+# that overlap (e.g. "not" and "timeout" in "notimeout") are all found.
+_ERROR_KEYWORDS_RE = re.compile(
+    r"(?=(?P<permission_denied>access|denied|permission)"
+    r"|(?P<file_not_found>not found|cannot find)"
+    r"|(?P<syntax_error>syntax|unexpected token)"
+    r"|(?P<invalid_argument>invalid|illegal)"
+    r"|(?P<timeout>timeout|timed out)"
+    r"|(?P<not_recognized>not recognized)"
+    r"|(?P<path>path)"
+    r"|(?P<negation>not))",
+    re.IGNORECASE
+)
+
+# Categories decided by keywords alone, highest priority first
+_KEYWORD_CATEGORIES = ("permission_denied", "file_not_found", "syntax_error", "invalid_argument", "timeout")
+
+# Unix commands that are not PowerShell aliases, with the cmdlet form to use
+# instead and the number of arguments that form takes. Commands such as ls,
+# cat or rm are aliased and never fail this way.
+_POWERSHELL_EQUIVALENTS = {
+    "grep": ("Select-String -Pattern {0}", 1),
+    "which": ("Get-Command {0}", 1),
+    "touch": ("New-Item -ItemType File -Path {0}", 1),
+    "head": ("Select-Object -First 10", 0),
+    "tail": ("Select-Object -Last 10", 0),
+    "wc": ("Measure-Object -Line -Word -Character", 0),
+    "uname": ("Get-ComputerInfo", 0),
+    "df": ("Get-PSDrive", 0),
+}
+
+# Command name quoted by PowerShell's "not recognized" error
+_NOT_RECOGNIZED_RE = re.compile(r"The term '([^']+)' is not recognized", re.IGNORECASE)
+
+# Size of the error prefix that keys the cache of LLM analyses
+_ERROR_PREFIX_CHARS = 200
+
+
+def _quick_fix_command_not_found(failed_command: str, error_output: str, shell_type: str) -> Optional[str]:
+    """
+    Replace a Unix command unknown to PowerShell with its cmdlet.
+
+    Only uses with exactly the arguments the cmdlet form expects are
+    rewritten, e.g. "grep error" reading piped input or "head" at the end of
+    a pipeline. Options and any other arguments (such as a file for head)
+    change what the cmdlet binds them to, so those are left to the LLM.
+
+    Args:
+        failed_command: The command that failed
+        error_output: Error message from stderr
+        shell_type: Shell that was used
+
+    Returns:
+        Corrected command, or None if there is no canned fix
+    """
+    if shell_type != "powershell":
+        return None
+
+    match = _NOT_RECOGNIZED_RE.search(error_output)
+    if not match or match.group(1) not in _POWERSHELL_EQUIVALENTS:
+        return None
+    term = match.group(1)
+
+    template, arg_count = _POWERSHELL_EQUIVALENTS[term]
+
+    segments = failed_command.split("|")
+    for i, segment in enumerate(segments):
+        words = segment.split()
+        if not words or words[0] != term:
+            continue
+        args = words[1:]
+        if len(args) != arg_count or any(arg.startswith("-") for arg in args):
+            return None
+        # Surrounding whitespace is kept so the pipes stay spaced as written
+        stripped = segment.strip()
+        segments[i] = segment.replace(stripped, template.format(*args), 1)
+
+    corrected = "|".join(segments)
+    return corrected if corrected != failed_command else None
+
+
+# Canned corrections by error category, tried before asking the LLM. There is
+# no entry for permission_denied: the fix (elevation, another path) depends on
+# the intent, which only the LLM can weigh.
+_QUICK_FIX_TABLE = {
+    "command_not_found": _quick_fix_command_not_found,
+}
+
+# System prompts hold every fixed instruction, including the response schema.
+# They take no parameters, so the prompt prefix is identical between calls
+# and OpenAI's prompt caching can reuse it; the shell type goes in the user
+# prompt instead.
+_FAILURE_SYSTEM_PROMPT = """You are an expert command-line troubleshooter for PowerShell, CMD and Bash. Analyze command failures and provide corrections.
+
+Your task:
+1. Understand WHY the command failed
+2. Identify the root cause
+3. Generate a corrected command that will work in the same shell
+4. Explain what you changed
+
+Be specific and technical. Focus on fixing the actual problem.
+
+Provide your analysis in JSON format:
+{
+    "failure_reason": "Brief explanation of why it failed",
+    "root_cause": "syntax_error|permission_denied|file_not_found|invalid_argument|path_issue|command_not_found|other",
+    "corrected_command": "The fixed command",
+    "explanation": "What you changed and why",
+    "confidence": "low|medium|high",
+    "should_retry": true/false,
+    "alternative_approaches": ["list", "of", "alternative", "solutions"]
+}"""
+
+_TIMEOUT_SYSTEM_PROMPT = """You are a command optimization expert. Analyze why commands timeout and provide faster alternatives.
+
+Explain why the command might time out and suggest a faster alternative or optimized version.
+
+Respond in JSON:
+{
+    "failure_reason": "Why it likely timed out",
+    "root_cause": "performance_issue",
+    "corrected_command": "Optimized or alternative command",
+    "explanation": "What you optimized",
+    "confidence": "low|medium|high",
+    "should_retry": true/false
+}"""
+
+_ALTERNATIVE_SYSTEM_PROMPT = """You are a creative command-line problem solver.
+When standard approaches fail, find alternative methods to achieve the same goal.
+
+Suggest a COMPLETELY DIFFERENT approach that might work in the given shell. Think outside the box.
+
+Respond in JSON:
+{
+    "failure_reason": "Summary of why previous attempts failed",
+    "alternative_approach": "Describe the new approach",
+    "corrected_command": "Command using the new approach",
+    "explanation": "Why this might work when others didn't",
+    "confidence": "low|medium|high",
+    "should_retry": true/false
+}"""
+
 
 class FailureAnalyzer:
     """
@@ -32,11 +233,81 @@ class FailureAnalyzer:
             model: Model to use for analysis
             temperature: Temperature for generation
         """
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
         self.model = model
         self.temperature = temperature
         self.logger = logging.getLogger(__name__)
 
+        # Cleared when the model rejects structured outputs; JSON mode is
+        # used from then on
+        self._structured_outputs = True
+
+        # LLM analyses keyed by command and error prefix, so a failure seen
+        # before is answered without another round-trip
+        self._analysis_cache = ResultCache(maxsize=256, ttl=3600)
+
+    async def _request_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        schema: Type[BaseModel],
+        temperature: float
+    ) -> Dict[str, Any]:
+        """
+        Request a JSON analysis, validated against schema where supported.
+
+        Structured outputs make the server constrain the response to the
+        schema, so it always parses; models without support fall back to
+        JSON mode, which relies on the schema described in the prompt.
+
+        Args:
+            system_prompt: System message content
+            user_prompt: User message content
+            schema: Pydantic model of the response
+            temperature: Sampling temperature
+
+        Returns:
+            Parsed analysis dictionary
+
+        Raises:
+            ValueError: If the model refused the request
+            BadRequestError: If the request was rejected for another reason
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+        if self._structured_outputs:
+            try:
+                response = await self.client.beta.chat.completions.parse(
+                    model=self.model,
+                    temperature=temperature,
+                    messages=messages,
+                    response_format=schema,
+                    max_tokens=_MAX_TOKENS
+                )
+            except BadRequestError as e:
+                if not structured_outputs_unsupported(e):
+                    raise
+                self.logger.warning(f"Structured outputs unavailable for {self.model}, using JSON mode: {e}")
+                self._structured_outputs = False
+            else:
+                message = response.choices[0].message
+                if message.parsed is None:
+                    raise ValueError(f"OpenAI refused the request: {message.refusal}")
+                return message.parsed.model_dump()
+
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            temperature=temperature,
+            messages=messages,
+            response_format={"type": "json_object"},
+            max_tokens=_MAX_TOKENS
+        )
+
+        return _json_loads(response.choices[0].message.content)
+
     async def analyze_failure(
         self,
         user_intent: str,
@@ -69,16 +340,40 @@ class FailureAnalyzer:
 
         self.logger.info(f"Analyzing failure: {failed_command}")
 
-        # Build analysis prompt
-        system_prompt = f"""You are an expert {shell_type} troubleshooter. Analyze command failures and provide corrections.
-
-Your task:
-1. Understand WHY the command failed
-2. Identify the root cause
-3. Generate a corrected command that will work
-4. Explain what you changed
+        # Trivially classifiable failures get a canned correction without
+        # an LLM round-trip. PowerShell's full "not recognized" message also
+        # mentions the path, which categorize_error() reports as path_issue,
+        # so that message is matched directly.
+        if _NOT_RECOGNIZED_RE.search(error_output):
+            category = "command_not_found"
+        else:
+            category = self.categorize_error(error_output, return_code)
+        quick_fix = _QUICK_FIX_TABLE.get(category)
+        corrected_command = quick_fix(failed_command, error_output, shell_type) if quick_fix else None
+        if corrected_command:
+            self.logger.info(f"Quick fix for {category}: {corrected_command}")
+            return {
+                "failure_reason": f"The command is not recognized by {shell_type}",
+                "root_cause": category,
+                "corrected_command": corrected_command,
+                "explanation": "Replaced the command with its PowerShell equivalent",
+                "confidence": "medium",
+                "should_retry": True,
+                "alternative_approaches": []
+            }
 
-Be specific and technical. Focus on fixing the actual problem."""
+        # Everything the prompt depends on is part of the key: the intent
+        # shapes the correction, and earlier attempts keep a suggestion that
+        # already failed from being handed out again
+        cache_key = hash_key(
+            self.model, shell_type, user_intent, failed_command, return_code,
+            error_output[:_ERROR_PREFIX_CHARS],
+            *(attempt.get('command') for attempt in previous_attempts or ())
+        )
+        cached = self._analysis_cache.get(cache_key)
+        if cached is not None:
+            self.logger.info("Using cached failure analysis")
+            return dict(cached)
 
         # Build detailed user prompt
         user_prompt = f"""User wanted: "{user_intent}"
@@ -105,37 +400,16 @@ Shell Type: {shell_type}
                 user_prompt += f"{i}. Command: {attempt.get('command', 'N/A')}\n"
                 user_prompt += f"   Error: {attempt.get('error', 'N/A')[:200]}\n"
 
-        user_prompt += """
-Provide your analysis in JSON format:
-{
-    "failure_reason": "Brief explanation of why it failed",
-    "root_cause": "syntax_error|permission_denied|file_not_found|invalid_argument|path_issue|command_not_found|other",
-    "corrected_command": "The fixed command",
-    "explanation": "What you changed and why",
-    "confidence": "low|medium|high",
-    "should_retry": true/false,
-    "alternative_approaches": ["list", "of", "alternative", "solutions"]
-}
-"""
-
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                temperature=self.temperature,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"}
+            analysis = await self._request_json(
+                _FAILURE_SYSTEM_PROMPT, user_prompt, FailureAnalysis, self.temperature
             )
 
-            import json
-            analysis = json.loads(response.choices[0].message.content)
-
             self.logger.info(f"Failure analysis: {analysis['failure_reason']}")
             self.logger.info(f"Corrected command: {analysis.get('corrected_command')}")
 
-            return analysis
+            self._analysis_cache.put(cache_key, analysis)
+            return dict(analysis)
 
         except Exception as e:
             self.logger.error(f"Failure analysis failed: {e}")
@@ -168,42 +442,19 @@ Provide your analysis in JSON format:
             Analysis with suggestions
         """
 
-        system_prompt = """You are a command optimization expert. Analyze why commands timeout and provide faster alternatives."""
-
         user_prompt = f"""User wanted: "{user_intent}"
 
 Command timed out after {timeout_seconds} seconds:
 ```
 {command}
 ```
-
-Why might this timeout? Suggest a faster alternative or optimized version.
-
-Respond in JSON:
-{{
-    "failure_reason": "Why it likely timed out",
-    "root_cause": "performance_issue",
-    "corrected_command": "Optimized or alternative command",
-    "explanation": "What you optimized",
-    "confidence": "low|medium|high",
-    "should_retry": true/false
-}}
 """
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                temperature=self.temperature,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"}
+            return await self._request_json(
+                _TIMEOUT_SYSTEM_PROMPT, user_prompt, TimeoutAnalysis, self.temperature
             )
 
-            import json
-            return json.loads(response.choices[0].message.content)
-
         except Exception as e:
             self.logger.error(f"Timeout analysis failed: {e}")
             return {
@@ -233,9 +484,6 @@ Respond in JSON:
             Alternative approach suggestion
         """
 
-        system_prompt = f"""You are a creative problem solver for {shell_type}.
-When standard approaches fail, find alternative methods to achieve the same goal."""
-
         attempts_summary = "\n".join([
             f"Attempt {i+1}: {attempt['command']}\nError: {attempt['error'][:200]}"
             for i, attempt in enumerate(failed_attempts)
@@ -243,38 +491,20 @@ When standard approaches fail, find alternative methods to achieve the same goal
 
         user_prompt = f"""User goal: "{user_intent}"
 
+Shell Type: {shell_type}
+
 Multiple approaches have failed:
 ```
 {attempts_summary}
 ```
-
-Suggest a COMPLETELY DIFFERENT approach that might work. Think outside the box.
-
-Respond in JSON:
-{{
-    "failure_reason": "Summary of why previous attempts failed",
-    "alternative_approach": "Describe the new approach",
-    "corrected_command": "Command using the new approach",
-    "explanation": "Why this might work when others didn't",
-    "confidence": "low|medium|high",
-    "should_retry": true/false
-}}
 """
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                temperature=0.5,  # Higher temperature for creativity
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"}
+            return await self._request_json(
+                _ALTERNATIVE_SYSTEM_PROMPT, user_prompt, AlternativeApproach,
+                0.5  # Higher temperature for creativity
             )
 
-            import json
-            return json.loads(response.choices[0].message.content)
-
         except Exception as e:
             self.logger.error(f"Alternative approach suggestion failed: {e}")
             return {
@@ -298,22 +528,18 @@ Respond in JSON:
             Error category
         """
 
-        error_lower = error_output.lower()
-
-        # Pattern matching for common errors
-        if "access" in error_lower or "denied" in error_lower or "permission" in error_lower:
-            return "permission_denied"
-        elif "not found" in error_lower or "cannot find" in error_lower:
-            return "file_not_found"
-        elif "syntax" in error_lower or "unexpected token" in error_lower:
-            return "syntax_error"
-        elif "invalid" in error_lower or "illegal" in error_lower:
-            return "invalid_argument"
-        elif "timeout" in error_lower or "timed out" in error_lower:
-            return "timeout"
-        elif "path" in error_lower and ("not" in error_lower or "invalid" in error_lower):
+        # One scan collects every keyword present; categories are then
+        # checked in priority order
+        found = {match.lastgroup for match in _ERROR_KEYWORDS_RE.finditer(error_output)}
+
+        for category in _KEYWORD_CATEGORIES:
+            if category in found:
+                return category
+
+        # "not recognized" also contains "not"
+        if "path" in found and ("negation" in found or "not_recognized" in found):
             return "path_issue"
-        elif return_code == 127 or "not recognized" in error_lower:
+        elif return_code == 127 or "not_recognized" in found:
             return "command_not_found"
         elif return_code == 1:
             return "general_error"
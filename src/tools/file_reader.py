@@ -1,13 +1,56 @@
 """File reading utility for content extraction and analysis."""
 
+import codecs
+import mmap
 import os
 import logging
-from typing import Dict, Any, Optional, List
+import re
+from collections import Counter
+from typing import Dict, Any, FrozenSet, Optional, List, Set, Tuple
 import subprocess
 import asyncio
 
+from utils.result_cache import ResultCache, hash_key
+
 logger = logging.getLogger(__name__)
 
+# Files read at once by read_multiple_files(); bounds the open descriptors
+_DEFAULT_READ_CONCURRENCY = 64
+
+# Files larger than this are memory-mapped rather than read into a buffer
+_MMAP_THRESHOLD = 64 * 1024
+
+# Codec names (as normalized by codecs.lookup) that decode UTF-8
+_UTF8_CODECS = frozenset({'utf-8', 'utf-8-sig'})
+
+# A well-formed multi-byte UTF-8 sequence. Text containing one is taken to be
+# UTF-8 even if other bytes in it are not valid UTF-8.
+_UTF8_MULTIBYTE_RE = re.compile(
+    rb'[\xc2-\xdf][\x80-\xbf]'
+    rb'|\xe0[\xa0-\xbf][\x80-\xbf]|[\xe1-\xec\xee\xef][\x80-\xbf]{2}|\xed[\x80-\x9f][\x80-\xbf]'
+    rb'|\xf0[\x90-\xbf][\x80-\xbf]{2}|[\xf1-\xf3][\x80-\xbf]{3}|\xf4[\x80-\x8f][\x80-\xbf]{2}'
+)
+
+# Common file path patterns searched for in command output
+_PATH_PATTERNS = (
+    re.compile(r'([A-Z]:\\[^\s\n]+)'),  # Windows absolute paths
+    re.compile(r'(/[^\s\n]+)'),  # Unix absolute paths
+    re.compile(r'\.\\([^\s\n]+)'),  # Relative paths
+)
+
+# Directories list_files_recursive() skips unless told otherwise
+_DEFAULT_EXCLUDED_DIRS = ['.git', 'node_modules', '__pycache__', '.venv', 'venv', 'dist', 'build']
+
+# Seconds a repository's git ls-files listing is reused for
+_GIT_FILES_TTL = 5.0
+
+# Top-level files looked for by get_repository_structure(), in priority order
+_README_NAMES = ('README.md', 'README.txt', 'README', 'readme.md')
+_COMMON_CONFIG_FILES = (
+    'package.json', 'requirements.txt', 'pom.xml', 'build.gradle',
+    'Cargo.toml', 'go.mod', 'composer.json', '.env.example'
+)
+
 
 class FileReader:
     """
@@ -30,10 +73,90 @@ class FileReader:
         self.max_file_size = max_file_size
         self.logger = logging.getLogger(__name__)
 
+        # Recent git ls-files listings by repository; see get_git_repo_files()
+        self._git_files_cache = ResultCache(maxsize=16, ttl=_GIT_FILES_TTL)
+
+    @staticmethod
+    def _read_text(file_path: str, limit: int, encodings: List[str]) -> Tuple[str, str, int]:
+        """
+        Read and decode up to limit bytes of a file (blocking; runs in a worker thread).
+
+        Files above _MMAP_THRESHOLD are memory-mapped and decoded straight
+        from the page cache, skipping the intermediate bytes copy.
+
+        Args:
+            file_path: Path to file
+            limit: Maximum number of bytes to read
+            encodings: Encodings to try, in order; the last must decode any
+                bytes (e.g. latin-1). A UTF-8 encoding that fails on text
+                holding valid multi-byte UTF-8 is used anyway, with the
+                invalid bytes replaced, rather than falling through to a
+                single-byte codec that would garble every such character.
+                If the first is UTF-8 and the data starts with a UTF-8 BOM,
+                utf-8-sig is used so the BOM is not part of the content.
+
+        Returns:
+            Tuple of the decoded content, the encoding used, and the full
+            file size
+        """
+        try:
+            f = open(file_path, 'rb')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
+
+        with f:
+            file_size = os.fstat(f.fileno()).st_size
+            truncated = file_size > limit
+
+            if file_size > _MMAP_THRESHOLD:
+                mapping = mmap.mmap(f.fileno(), min(file_size, limit), access=mmap.ACCESS_READ)
+                data = memoryview(mapping)
+            else:
+                mapping = None
+                data = f.read(limit)
+
+            def decode(encoding: str, errors: str) -> str:
+                if truncated:
+                    # A character cut off by the limit is dropped rather
+                    # than failing the decode
+                    return codecs.getincrementaldecoder(encoding)(errors).decode(data)
+                return str(data, encoding, errors)
+
+            if data[:3] == codecs.BOM_UTF8 and codecs.lookup(encodings[0]).name == 'utf-8':
+                encodings = ['utf-8-sig', *encodings[1:]]
+
+            try:
+                # The file is read once; each encoding strictly decodes the
+                # same buffer, so the first that fits wins
+                for encoding in encodings:
+                    try:
+                        content = decode(encoding, 'strict')
+                    except UnicodeDecodeError:
+                        if codecs.lookup(encoding).name in _UTF8_CODECS and _UTF8_MULTIBYTE_RE.search(data):
+                            # UTF-8 with a few stray bytes
+                            content = decode(encoding, 'replace')
+                            break
+                        continue
+                    break
+            finally:
+                if mapping is not None:
+                    data.release()
+                    mapping.close()
+
+        # Same newline translation as reading in text mode
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content, encoding, file_size
+
     async def read_file(self, file_path: str, encoding: str = "utf-8") -> Dict[str, Any]:
         """
         Read file content.
 
+        The file is read in a worker thread, so concurrent reads (see
+        read_multiple_files) never block the event loop. Files that do not
+        decode with encoding are read as utf-8-sig, cp1252, then latin-1;
+        see _read_text() for UTF-8 files with stray bytes or a BOM.
+
         Args:
             file_path: Path to file
             encoding: File encoding (default: utf-8)
@@ -42,10 +165,10 @@ class FileReader:
             Dictionary with file metadata and content
         """
 
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found: {file_path}")
-
-        file_size = os.path.getsize(file_path)
+        content, used_encoding, file_size = await asyncio.to_thread(
+            self._read_text, file_path, self.max_file_size,
+            [encoding, 'utf-8-sig', 'cp1252', 'latin-1']
+        )
 
         if file_size > self.max_file_size:
             self.logger.warning(f"File too large ({file_size} bytes), reading first {self.max_file_size} bytes")
@@ -55,60 +178,29 @@ class FileReader:
 
         self.logger.info(f"Reading file: {file_path} ({file_size} bytes)")
 
-        try:
-            # Try reading with specified encoding
-            with open(file_path, 'r', encoding=encoding, errors='replace') as f:
-                if truncated:
-                    content = f.read(self.max_file_size)
-                else:
-                    content = f.read()
-
-            return {
-                "file_path": file_path,
-                "content": content,
-                "size": file_size,
-                "truncated": truncated,
-                "encoding": encoding,
-                "lines": len(content.splitlines()),
-                "extension": os.path.splitext(file_path)[1]
-            }
-
-        except UnicodeDecodeError:
-            # Try with different encodings
-            for alt_encoding in ['latin-1', 'cp1252', 'iso-8859-1']:
-                try:
-                    with open(file_path, 'r', encoding=alt_encoding, errors='replace') as f:
-                        content = f.read(self.max_file_size) if truncated else f.read()
-
-                    self.logger.info(f"Successfully read with {alt_encoding} encoding")
-                    return {
-                        "file_path": file_path,
-                        "content": content,
-                        "size": file_size,
-                        "truncated": truncated,
-                        "encoding": alt_encoding,
-                        "lines": len(content.splitlines()),
-                        "extension": os.path.splitext(file_path)[1]
-                    }
-                except Exception:
-                    continue
+        if used_encoding != encoding:
+            self.logger.info(f"Successfully read with {used_encoding} encoding")
+
+        # Counted without building the list of lines splitlines() returns
+        lines = content.count('\n')
+        if content and not content.endswith('\n'):
+            lines += 1
 
-            # If all encodings fail, return binary info
-            self.logger.error(f"Could not decode file: {file_path}")
-            return {
-                "file_path": file_path,
-                "content": f"[Binary file - could not decode as text]",
-                "size": file_size,
-                "truncated": False,
-                "encoding": "binary",
-                "lines": 0,
-                "extension": os.path.splitext(file_path)[1]
-            }
+        return {
+            "file_path": file_path,
+            "content": content,
+            "size": file_size,
+            "truncated": truncated,
+            "encoding": used_encoding,
+            "lines": lines,
+            "extension": os.path.splitext(file_path)[1]
+        }
 
     async def read_multiple_files(
         self,
         file_paths: List[str],
-        encoding: str = "utf-8"
+        encoding: str = "utf-8",
+        concurrency: int = _DEFAULT_READ_CONCURRENCY
     ) -> List[Dict[str, Any]]:
         """
         Read multiple files concurrently.
@@ -116,13 +208,22 @@ class FileReader:
         Args:
             file_paths: List of file paths
             encoding: File encoding
+            concurrency: Maximum files read at the same time
 
         Returns:
             List of file read results
         """
 
-        tasks = [self.read_file(path, encoding) for path in file_paths]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def read_one(path: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.read_file(path, encoding)
+
+        results = await asyncio.gather(
+            *(read_one(path) for path in file_paths),
+            return_exceptions=True
+        )
 
         # Filter out exceptions
         valid_results = []
@@ -142,6 +243,9 @@ class FileReader:
         """
         Get list of files in a git repository.
 
+        A listing is reused for a few seconds, so analyses of the same
+        repository in quick succession spawn git only once.
+
         Args:
             repo_path: Path to git repository
             max_files: Maximum number of files to return
@@ -154,12 +258,17 @@ class FileReader:
             # Not a git repo, just list files
             return await self.list_files_recursive(repo_path, max_files)
 
+        cache_key = hash_key(repo_path, max_files)
+        cached = self._git_files_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         self.logger.info(f"Getting files from git repo: {repo_path}")
 
         try:
             # Use git ls-files to get tracked files
             result = await asyncio.create_subprocess_exec(
-                "git", "ls-files",
+                "git", "ls-files", "-z",
                 cwd=repo_path,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
@@ -171,11 +280,16 @@ class FileReader:
                 self.logger.warning(f"Git ls-files failed: {stderr.decode()}")
                 return await self.list_files_recursive(repo_path, max_files)
 
-            files = stdout.decode().strip().split('\n')
+            # NUL-separated, so paths are neither quoted nor split on
+            # newlines; only the entries kept are decoded
+            names = stdout.split(b'\0', max_files)[:max_files]
             # Convert to absolute paths
-            files = [os.path.join(repo_path, f) for f in files if f]
-
-            return files[:max_files]
+            files = [
+                os.path.join(repo_path, name.decode('utf-8', 'surrogateescape'))
+                for name in names if name
+            ]
+            self._git_files_cache.put(cache_key, files)
+            return list(files)
 
         except Exception as e:
             self.logger.error(f"Failed to get git files: {e}")
@@ -200,20 +314,66 @@ class FileReader:
         """
 
         if exclude_dirs is None:
-            exclude_dirs = ['.git', 'node_modules', '__pycache__', '.venv', 'venv', 'dist', 'build']
+            exclude_dirs = _DEFAULT_EXCLUDED_DIRS
 
-        files = []
+        return self._walk_files(directory, max_files, frozenset(exclude_dirs))
+
+    def _walk_files(
+        self,
+        directory: str,
+        max_files: int,
+        excluded: FrozenSet[str],
+        root_names: Optional[Set[str]] = None
+    ) -> List[str]:
+        """
+        Collect file paths depth-first, in the same order as os.walk.
 
-        for root, dirs, filenames in os.walk(directory):
-            # Remove excluded directories from search
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        Args:
+            directory: Directory to scan
+            max_files: Maximum files to return
+            excluded: Directory names not descended into
+            root_names: If given, receives the normcased names of every entry
+                directly in directory, even past the file limit
 
-            for filename in filenames:
-                files.append(os.path.join(root, filename))
+        Returns:
+            List of file paths
+        """
+        files = []
 
-                if len(files) >= max_files:
-                    self.logger.warning(f"Reached max file limit: {max_files}")
-                    return files
+        # A directory's files, then each subdirectory in turn
+        stack = [directory]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    subdirs = []
+                    for entry in entries:
+                        if root_names is not None:
+                            root_names.add(os.path.normcase(entry.name))
+                        if len(files) >= max_files:
+                            # Only reached while finishing the root's names
+                            continue
+
+                        # Symlinked directories are skipped, as os.walk does
+                        if entry.is_dir():
+                            if entry.name not in excluded and not entry.is_symlink():
+                                subdirs.append(entry.path)
+                            continue
+
+                        files.append(entry.path)
+
+                        if len(files) >= max_files:
+                            self.logger.warning(f"Reached max file limit: {max_files}")
+                            if root_names is None:
+                                return files
+            except OSError:
+                # Unreadable directories are skipped, as os.walk does
+                continue
+            finally:
+                root_names = None
+
+            if len(files) >= max_files:
+                return files
+            stack.extend(reversed(subdirs))
 
         return files
 
@@ -233,22 +393,22 @@ class FileReader:
             File content if found
         """
 
-        # Try to find file paths in output
-        import re
-
-        # Common file path patterns
-        patterns = [
-            r'([A-Z]:\\[^\s\n]+)',  # Windows absolute paths
-            r'(/[^\s\n]+)',  # Unix absolute paths
-            r'\.\\([^\s\n]+)',  # Relative paths
-        ]
+        # Every default pattern needs a path separator; skip the scan without one
+        if not file_pattern and "\\" not in command_output and "/" not in command_output:
+            return None
 
+        patterns = list(_PATH_PATTERNS)
         if file_pattern:
-            patterns.insert(0, file_pattern)
+            patterns.insert(0, re.compile(file_pattern))
 
+        # Paths repeated in the output are only checked once
+        checked = set()
         for pattern in patterns:
-            matches = re.findall(pattern, command_output)
-            for match in matches:
+            for match in pattern.findall(command_output):
+                if match in checked:
+                    continue
+                checked.add(match)
+
                 if os.path.isfile(match):
                     try:
                         return await self.read_file(match)
@@ -274,35 +434,33 @@ class FileReader:
 
         self.logger.info(f"Analyzing repository structure: {repo_path}")
 
-        files = await self.list_files_recursive(repo_path, max_files=200)
+        # A single walk, off the event loop, lists the files and collects the
+        # top-level names checked below; names are normcased so matching
+        # stays case-insensitive on Windows
+        top_level = set()
+        files = await asyncio.to_thread(
+            self._walk_files, repo_path, 200, frozenset(_DEFAULT_EXCLUDED_DIRS), top_level
+        )
 
         # Count by extension
-        extensions = {}
-        for file_path in files:
-            ext = os.path.splitext(file_path)[1] or 'no_extension'
-            extensions[ext] = extensions.get(ext, 0) + 1
+        extensions = dict(Counter(os.path.splitext(path)[1] or 'no_extension' for path in files))
 
         # Try to read README
         readme_content = None
-        for readme_name in ['README.md', 'README.txt', 'README', 'readme.md']:
-            readme_path = os.path.join(repo_path, readme_name)
-            if os.path.exists(readme_path):
+        for readme_name in _README_NAMES:
+            if os.path.normcase(readme_name) in top_level:
                 try:
-                    result = await self.read_file(readme_path)
+                    result = await self.read_file(os.path.join(repo_path, readme_name))
                     readme_content = result['content']
                     break
                 except Exception:
                     pass
 
         # Check for common config files
-        config_files = []
-        common_configs = [
-            'package.json', 'requirements.txt', 'pom.xml', 'build.gradle',
-            'Cargo.toml', 'go.mod', 'composer.json', '.env.example'
+        config_files = [
+            config for config in _COMMON_CONFIG_FILES
+            if os.path.normcase(config) in top_level
         ]
-        for config in common_configs:
-            if os.path.exists(os.path.join(repo_path, config)):
-                config_files.append(config)
 
         return {
             "repo_path": repo_path,
@@ -311,5 +469,5 @@ class FileReader:
             "extensions": extensions,
             "readme_content": readme_content,
             "config_files": config_files,
-            "is_git_repo": os.path.exists(os.path.join(repo_path, ".git"))
+            "is_git_repo": os.path.normcase(".git") in top_level
         }
@@ -0,0 +1,149 @@
+"""Shared OpenAI client with a pooled, keep-alive HTTP transport."""
+
+from functools import lru_cache
+import asyncio
+import logging
+import time
+
+import httpx
+from openai import AsyncOpenAI, BadRequestError, DefaultAsyncHttpxClient
+
+# HTTP/2 needs the optional h2 package; without it httpx speaks HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Transport settings for the API connection pool
+_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+
+
+# Client-side rate limits, per minute; tightened from the x-ratelimit-*
+# response headers, which report the account's actual remaining budget
+_REQUESTS_PER_MINUTE = 5000
+_TOKENS_PER_MINUTE = 15_000_000
+
+# Rough request size in tokens per byte of body
+_TOKENS_PER_BYTE = 0.25
+
+
+class _TokenBucket:
+    """Token bucket refilled continuously up to a per-minute capacity."""
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Capacity and refill rate per minute
+        """
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        """Wait until amount is available and take it."""
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self._rate)
+
+    def observe_remaining(self, remaining: str) -> None:
+        """Lower the balance to a server-reported remaining budget."""
+        try:
+            self.tokens = min(self.tokens, float(remaining))
+        except ValueError:
+            pass
+
+
+_request_bucket = _TokenBucket(_REQUESTS_PER_MINUTE)
+_token_bucket = _TokenBucket(_TOKENS_PER_MINUTE)
+
+
+async def _rate_limit(request: httpx.Request) -> None:
+    """
+    Hold a request until the rate limits allow it (httpx request hook).
+
+    Waiting client-side avoids 429 responses, whose retries with backoff
+    cost far more latency than the wait.
+    """
+    await _request_bucket.acquire(1)
+    body_size = int(request.headers.get("content-length") or 0)
+    await _token_bucket.acquire(body_size * _TOKENS_PER_BYTE)
+
+
+async def _observe_rate_limits(response: httpx.Response) -> None:
+    """Sync the buckets with the remaining limits reported by the API (httpx response hook)."""
+    remaining_requests = response.headers.get("x-ratelimit-remaining-requests")
+    if remaining_requests is not None:
+        _request_bucket.observe_remaining(remaining_requests)
+    remaining_tokens = response.headers.get("x-ratelimit-remaining-tokens")
+    if remaining_tokens is not None:
+        _token_bucket.observe_remaining(remaining_tokens)
+
+
+async def _log_http_version(response: httpx.Response) -> None:
+    """Log the protocol each API response arrived over (httpx response hook)."""
+    logger.debug("%s %s over %s", response.request.method, response.url.path, response.http_version)
+
+
+def structured_outputs_unsupported(error: BadRequestError) -> bool:
+    """
+    Check whether a 400 response rejects structured outputs themselves.
+
+    Only then should callers switch to JSON mode for good; other 400s
+    (context length, content filter, malformed messages) concern the request
+    and would fail the same way in JSON mode.
+
+    Args:
+        error: Error raised by a structured outputs request
+
+    Returns:
+        True if the error is about response_format or its JSON schema
+    """
+    fields = (error.param or "", error.code or "", error.message or "")
+    return any("response_format" in field or "json_schema" in field for field in fields)
+
+
+@lru_cache(maxsize=None)
+def get_openai_client(api_key: str) -> AsyncOpenAI:
+    """
+    Return the shared AsyncOpenAI client for an API key.
+
+    Every tool using the same key shares one client and its connection pool,
+    so the TCP/TLS handshake is paid once and reused across requests.
+
+    Args:
+        api_key: OpenAI API key
+
+    Returns:
+        Cached AsyncOpenAI client
+    """
+    logger.debug("Creating shared OpenAI client (http2=%s)", HTTP2_AVAILABLE)
+
+    return AsyncOpenAI(
+        api_key=api_key,
+        http_client=DefaultAsyncHttpxClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=_TIMEOUT,
+            limits=_LIMITS,
+            event_hooks={
+                "request": [_rate_limit],
+                "response": [_observe_rate_limits, _log_http_version]
+            }
+        )
+    )
@@ -1,10 +1,23 @@
 """Validates command execution results using LLM."""
 
-from openai import AsyncOpenAI
 from typing import Dict, Any
 import json
 import logging
 
+from tools.openai_client import get_openai_client
+
+# orjson is optional: it parses the JSON responses faster than the stdlib.
+# Its JSONDecodeError subclasses json.JSONDecodeError, so one handler covers both
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+# Output cap for the JSON verdict (passed, reasoning, suggestions, confidence)
+_MAX_TOKENS = 400
+
 
 class ResultValidator:
     """
@@ -20,7 +33,7 @@ class ResultValidator:
             model: Model to use (default: gpt-4o)
             temperature: Sampling temperature (default: 0.2 for consistent validation)
         """
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
         self.model = model
         self.temperature = temperature
         self.logger = logging.getLogger(__name__)
@@ -61,10 +74,11 @@ class ResultValidator:
                     {"role": "user", "content": prompt["user"]}
                 ],
                 response_format={"type": "json_object"},
-                temperature=self.temperature
+                temperature=self.temperature,
+                max_tokens=_MAX_TOKENS
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = _json_loads(response.choices[0].message.content)
 
             self.logger.info(
                 f"Validation result: passed={result.get('passed')}, "
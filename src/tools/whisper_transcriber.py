@@ -2,15 +2,18 @@
 
 import logging
 import os
+from pathlib import Path
 from typing import Optional, Dict, Any
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 try:
-    from openai import AsyncOpenAI
+    from tools.openai_client import get_openai_client
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
-    AsyncOpenAI = None
+    get_openai_client = None
 
 try:
     import whisper
@@ -21,6 +24,36 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Local Whisper models by name, shared by every transcriber
+_local_models: Dict[str, Any] = {}
+_local_models_lock = threading.Lock()
+
+# Local transcriptions hold a thread for seconds; they run one at a time on
+# their own thread, so they never starve the loop's default executor and
+# never run a shared model concurrently
+_local_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+
+
+def _load_local_model(name: str):
+    """
+    Return the local Whisper model of the given name, loading it on first use.
+
+    Models take seconds to load and up to several GB of memory, so each is
+    loaded once per process.
+
+    Args:
+        name: Whisper model name (tiny/base/small/medium/large)
+
+    Returns:
+        Loaded Whisper model
+    """
+    with _local_models_lock:
+        model = _local_models.get(name)
+        if model is None:
+            logger.info(f"Loading local Whisper model: {name}")
+            model = _local_models[name] = whisper.load_model(name)
+        return model
+
 
 class WhisperTranscriber:
     """
@@ -52,13 +85,17 @@ class WhisperTranscriber:
         self.language = language
         self.logger = logging.getLogger(__name__)
 
+        # Local model used by this transcriber; API transcribers fall back
+        # to the base model
+        self._local_model_name = model if use_local else "base"
+
         if use_local:
             if not LOCAL_WHISPER_AVAILABLE:
                 raise ImportError(
                     "Local Whisper not installed. Run: pip install openai-whisper"
                 )
-            self.logger.info(f"Loading local Whisper model: {model}")
-            self.whisper_model = whisper.load_model(model)
+            # Loaded on the first local transcription; see _load_local_model()
+            self.whisper_model = None
             self.client = None
         else:
             if not OPENAI_AVAILABLE:
@@ -68,10 +105,26 @@ class WhisperTranscriber:
             if not api_key:
                 raise ValueError("OpenAI API key required for API mode")
 
-            self.client = AsyncOpenAI(api_key=api_key)
+            self.client = get_openai_client(api_key)
             self.whisper_model = None
             self.logger.info(f"Using OpenAI Whisper API: {model}")
 
+    async def warm_up(self) -> None:
+        """
+        Open the API connection ahead of the first transcription.
+
+        Meant to run while audio is still being recorded, so the TLS handshake
+        overlaps recording instead of delaying the upload. Failures are only
+        logged; the transcription request then opens its own connection.
+        """
+        if self.use_local or self.client is None:
+            return
+
+        try:
+            await self.client.models.retrieve(self.model)
+        except Exception as e:
+            self.logger.debug(f"Whisper API warm-up failed: {e}")
+
     async def transcribe_file(
         self,
         audio_file_path: str,
@@ -114,7 +167,7 @@ class WhisperTranscriber:
             # Clean up temporary audio file
             try:
                 if audio_file_path.startswith(os.path.join(os.path.dirname(__file__), 'temp')):
-                    os.remove(audio_file_path)
+                    await asyncio.to_thread(os.remove, audio_file_path)
                     self.logger.debug(f"Cleaned up temp file: {audio_file_path}")
             except Exception as e:
                 self.logger.warning(f"Failed to clean up temp file: {e}")
@@ -137,15 +190,15 @@ class WhisperTranscriber:
 
         self.logger.info("Using OpenAI Whisper API")
 
-        with open(audio_file_path, "rb") as audio_file:
-            # Call OpenAI Whisper API
-            response = await self.client.audio.transcriptions.create(
-                model=self.model,
-                file=audio_file,
-                language=self.language,
-                prompt=prompt,
-                response_format="verbose_json"  # Get more details
-            )
+        # Given a path rather than an open file, the SDK reads the audio in a
+        # worker thread instead of on the event loop
+        response = await self.client.audio.transcriptions.create(
+            model=self.model,
+            file=Path(audio_file_path),
+            language=self.language,
+            prompt=prompt,
+            response_format="verbose_json"  # Get more details
+        )
 
         # Parse response
         result = {
@@ -177,9 +230,9 @@ class WhisperTranscriber:
         self.logger.info(f"Using local Whisper model: {self.model}")
 
         # Run Whisper in executor to avoid blocking
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         transcribe_result = await loop.run_in_executor(
-            None,
+            _local_executor,
             self._whisper_transcribe_blocking,
             audio_file_path,
             prompt
@@ -220,6 +273,9 @@ class WhisperTranscriber:
         if prompt:
             options["initial_prompt"] = prompt
 
+        if self.whisper_model is None:
+            self.whisper_model = _load_local_model(self._local_model_name)
+
         result = self.whisper_model.transcribe(audio_file_path, **options)
         return result
 
@@ -266,8 +322,6 @@ class WhisperTranscriber:
                 original_mode = self.use_local
                 self.use_local = True
                 try:
-                    if not self.whisper_model:
-                        self.whisper_model = whisper.load_model("base")
                     result = await self.transcribe_file(audio_file_path, prompt)
                     return result
                 finally:
@@ -285,13 +339,22 @@ class WhisperTranscriber:
             directory: Directory to clean (default: system temp)
         """
         import tempfile
-        import glob
 
         if not directory:
             directory = tempfile.gettempdir()
 
-        pattern = os.path.join(directory, "voice_input_*.wav")
-        temp_files = glob.glob(pattern)
+        # A shared temp directory can hold many files; one scandir pass with
+        # plain prefix/suffix checks replaces glob's listdir and fnmatch
+        try:
+            with os.scandir(directory) as entries:
+                temp_files = [
+                    entry.path for entry in entries
+                    if entry.name.startswith("voice_input_") and entry.name.endswith(".wav")
+                    and entry.is_file(follow_symlinks=False)
+                ]
+        except OSError as e:
+            self.logger.debug(f"Failed to scan {directory}: {e}")
+            return
 
         for file_path in temp_files:
             try:
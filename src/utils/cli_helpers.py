@@ -1,14 +1,23 @@
 """CLI utility functions for formatting and display."""
 
+from pygments.lexers import get_lexer_by_name
 from rich.console import Console
 from rich.panel import Panel
 from rich.syntax import Syntax
-from rich.table import Table
 from typing import Dict, Any
 
 
 console = Console()
 
+# Built once: given names, Syntax looks up the lexer and builds the theme
+# (with an empty style cache) on every render
+_POWERSHELL_LEXER = get_lexer_by_name("powershell")
+_SYNTAX_THEME = Syntax.get_theme("monokai")
+
+# Output characters shown in a results panel; the executor keeps up to 1MB
+# per stream, far more than is readable and slow to lay out
+_MAX_PANEL_CHARS = 64 * 1024
+
 
 def display_welcome():
     """Display welcome message."""
@@ -42,8 +51,8 @@ def display_command_for_confirmation(state: Dict[str, Any]) -> None:
     # Syntax highlighted PowerShell code
     syntax = Syntax(
         state["generated_command"],
-        "powershell",
-        theme="monokai",
+        _POWERSHELL_LEXER,
+        theme=_SYNTAX_THEME,
         line_numbers=False,
         padding=(1, 2)
     )
@@ -52,21 +61,22 @@ def display_command_for_confirmation(state: Dict[str, Any]) -> None:
     console.print(f"[bold]Explanation:[/bold] {state['command_explanation']}\n")
 
     # Safety information
+    # Each block goes out in a single print rather than one per warning
     safety = state["safety_assessment"]
     if safety["level"] == "dangerous":
-        console.print("[red bold]⚠️  DANGER: This command has been blocked![/red bold]")
-        for warning in safety["warnings"]:
-            console.print(f"  [red]• {warning}[/red]")
-        console.print()
+        lines = ["[red bold]⚠️  DANGER: This command has been blocked![/red bold]"]
+        style = "red"
     elif safety["level"] == "suspicious":
-        console.print("[yellow bold]⚠️  Caution:[/yellow bold]")
-        for warning in safety["warnings"]:
-            console.print(f"  [yellow]• {warning}[/yellow]")
-        console.print()
+        lines = ["[yellow bold]⚠️  Caution:[/yellow bold]"]
+        style = "yellow"
     elif safety["warnings"]:
-        for warning in safety["warnings"]:
-            console.print(f"  [dim]• {warning}[/dim]")
-        console.print()
+        lines = []
+        style = "dim"
+    else:
+        return
+
+    lines.extend(f"  [{style}]• {warning}[/{style}]" for warning in safety["warnings"])
+    console.print("\n".join(lines), end="\n\n")
 
 
 def display_execution_results(state: Dict[str, Any]) -> None:
@@ -112,13 +122,18 @@ def display_execution_results(state: Dict[str, Any]) -> None:
     stdout = result.get("stdout", "")
     if stdout:
         console.print("[bold]Output:[/bold]")
-        console.print(Panel(stdout.strip(), border_style="green", padding=(1, 2)))
+        # Slicing first means only the shown part is ever copied
+        console.print(Panel(stdout[:_MAX_PANEL_CHARS].strip(), border_style="green", padding=(1, 2)))
+        if result.get("stdout_truncated") or len(stdout) > _MAX_PANEL_CHARS:
+            console.print("[dim yellow]... (output truncated)[/dim yellow]")
 
     # Errors/Warnings
     stderr = result.get("stderr", "")
     if stderr:
         console.print("[bold]Errors/Warnings:[/bold]")
-        console.print(Panel(stderr.strip(), border_style="red", padding=(1, 2)))
+        console.print(Panel(stderr[:_MAX_PANEL_CHARS].strip(), border_style="red", padding=(1, 2)))
+        if result.get("stderr_truncated") or len(stderr) > _MAX_PANEL_CHARS:
+            console.print("[dim yellow]... (error output truncated)[/dim yellow]")
 
     # Validation
     if state.get("validation_passed") is not None:
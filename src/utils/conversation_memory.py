@@ -1,14 +1,52 @@
 """Conversation memory manager for maintaining context across sessions."""
 
+import atexit
 import json
 import logging
+import os
+import threading
+import time
 from collections import deque
+from itertools import islice
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pathlib import Path
 
+# orjson is optional: it serializes the memory file several times faster than
+# the stdlib. Both write compact UTF-8, so either reads the other's files
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between writes of the memory file; changes made sooner are
+# coalesced into one delayed write
+_FLUSH_INTERVAL = 2.0
+
+# The memory file is a JSON Lines log, one conversation per line, appended to
+# as conversations are added. It is rewritten with only the conversations
+# held once it grows past this many lines per conversation kept
+_COMPACT_FACTOR = 4
+
+
+def _dump_json(data: Dict[str, Any]) -> bytes:
+    """Serialize data as one line of UTF-8 JSON."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+_load_json = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+
+def _preview(text: Optional[str], limit: int) -> str:
+    """Return the first limit characters of text, treating None as empty."""
+    return text[:limit] if text else ""
+
 
 class ConversationMemory:
     """
@@ -16,7 +54,7 @@ class ConversationMemory:
 
     Features:
     - Keeps last N conversations in memory
-    - Persists to disk (JSON)
+    - Persists to disk (JSON Lines)
     - Provides context for LLM
     - Thread-safe operations
     """
@@ -32,27 +70,47 @@ class ConversationMemory:
 
         Args:
             max_conversations: Maximum number of conversations to keep
-            storage_file: Path to JSON file for persistence
+            storage_file: Path to JSON Lines file for persistence
             enable_persistence: Whether to save/load from disk
         """
         self.max_conversations = max_conversations
         self.enable_persistence = enable_persistence
-        self.logger = logging.getLogger(__name__)
 
         # Use deque for efficient FIFO operations
         self.conversations: deque = deque(maxlen=max_conversations)
 
+        # Bumped on every change; keys the cached context messages
+        self._version = 0
+        self._context_cache = None
+        self._context_text_cache = None
+        self._search_cache = None
+
         # Storage file path
         if storage_file:
             self.storage_file = Path(storage_file)
+            self._legacy_file = None
         else:
             # Default to user home directory
-            home = Path.home()
-            self.storage_file = home / ".claude" / "langgraph_powershell" / "conversation_memory.json"
+            storage_dir = Path.home() / ".claude" / "langgraph_powershell"
+            self.storage_file = storage_dir / "conversation_memory.jsonl"
+            # Read when the log does not exist yet; see load_from_disk()
+            self._legacy_file = storage_dir / "conversation_memory.json"
+
+        # Pending-write state; see _schedule_save(). Conversations not yet
+        # appended to the log, and whether it must be rewritten instead
+        self._pending: List[Dict[str, Any]] = []
+        self._rewrite_needed = False
+        self._lines_on_disk = 0
+        self._file = None
+        self._last_flush = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_lock = threading.Lock()
 
         # Ensure directory exists
         if self.enable_persistence:
             self.storage_file.parent.mkdir(parents=True, exist_ok=True)
+            # Pending changes are written even if flush() is never called
+            atexit.register(self.flush)
 
         # Load existing conversations
         if self.enable_persistence:
@@ -82,28 +140,87 @@ class ConversationMemory:
             "user_input": user_input,
             "generated_command": generated_command,
             "execution_result": {
-                "status": execution_result.get("return_code", -1) if execution_result else None,
-                "stdout_preview": execution_result.get("stdout", "")[:500] if execution_result else None,
-                "stderr_preview": execution_result.get("stderr", "")[:200] if execution_result else None
+                "status": execution_result.get("return_code", -1),
+                "stdout_preview": _preview(execution_result.get("stdout"), 500),
+                "stderr_preview": _preview(execution_result.get("stderr"), 200)
             } if execution_result else None,
             "analysis_result": {
-                "analysis_type": analysis_result.get("analysis_type") if analysis_result else None,
-                "summary": analysis_result.get("analysis", "")[:500] if analysis_result else None
+                "analysis_type": analysis_result.get("analysis_type"),
+                "summary": _preview(analysis_result.get("analysis"), 500)
             } if analysis_result else None,
             "metadata": metadata or {}
         }
 
-        self.conversations.append(conversation)
-        self.logger.info(f"Added conversation to memory (total: {len(self.conversations)})")
+        # One locked section, so a background flush sees the conversation
+        # either in both the deque and _pending or in neither
+        with self._flush_lock:
+            self.conversations.append(conversation)
+            self._version += 1
+            if self.enable_persistence:
+                self._pending.append(conversation)
+        logger.info(f"Added conversation to memory (total: {len(self.conversations)})")
 
         # Save to disk
         if self.enable_persistence:
-            self.save_to_disk()
+            self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        """
+        Write the memory file from a background thread, at most once per _FLUSH_INTERVAL.
+
+        The caller never waits on disk I/O, and changes arriving in quick
+        succession are coalesced into a single write.
+        """
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                return
+
+            delay = max(0.0, self._last_flush + _FLUSH_INTERVAL - time.monotonic())
+            self._flush_timer = threading.Timer(delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Write pending changes to disk now (also run at interpreter exit)."""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending and not self._rewrite_needed:
+                return
+
+            lines_after = self._lines_on_disk + len(self._pending)
+            if self._rewrite_needed or lines_after > _COMPACT_FACTOR * self.max_conversations:
+                self.save_to_disk()
+            else:
+                self._append_pending()
+            self._last_flush = time.monotonic()
+
+    def _append_pending(self) -> None:
+        """Append the pending conversations to the log."""
+        try:
+            if self._file is None:
+                self._file = open(self.storage_file, 'ab')
+            self._file.write(b"".join(_dump_json(conv) + b"\n" for conv in self._pending))
+            self._file.flush()
+
+            self._lines_on_disk += len(self._pending)
+            self._pending.clear()
+
+        except Exception as e:
+            logger.error(f"Failed to save conversations: {e}")
+
+    def _recent(self, count: int) -> List[Dict[str, Any]]:
+        """Return the last count conversations, oldest first (all of them if count <= 0)."""
+        start = max(0, len(self.conversations) - count) if count > 0 else 0
+        return list(islice(self.conversations, start, None))
 
     def get_context_for_llm(self, include_last_n: int = 3) -> str:
         """
         Format conversation history as context for LLM.
 
+        The result is cached until the memory changes.
+
         Args:
             include_last_n: Number of recent conversations to include
 
@@ -114,8 +231,12 @@ class ConversationMemory:
         if not self.conversations:
             return ""
 
+        cache_key = (self._version, include_last_n)
+        if self._context_text_cache is not None and self._context_text_cache[0] == cache_key:
+            return self._context_text_cache[1]
+
         # Get last N conversations
-        recent_conversations = list(self.conversations)[-include_last_n:]
+        recent_conversations = self._recent(include_last_n)
 
         context_lines = ["Previous conversation history:"]
 
@@ -136,7 +257,9 @@ class ConversationMemory:
                 summary = conv["analysis_result"]["summary"][:100]
                 context_lines.append(f"   Analysis: {summary}...")
 
-        return "\n".join(context_lines)
+        context = "\n".join(context_lines)
+        self._context_text_cache = (cache_key, context)
+        return context
 
     def get_recent_commands(self, count: int = 5) -> List[str]:
         """
@@ -169,49 +292,94 @@ class ConversationMemory:
 
     def clear_memory(self) -> None:
         """Clear all conversations from memory."""
-        self.conversations.clear()
-        self.logger.info("Cleared conversation memory")
+        with self._flush_lock:
+            self.conversations.clear()
+            self._version += 1
+            if self.enable_persistence:
+                self._pending.clear()
+                self._rewrite_needed = True
+        logger.info("Cleared conversation memory")
 
         if self.enable_persistence:
-            self.save_to_disk()
+            self.flush()
 
     def save_to_disk(self) -> None:
-        """Save conversations to disk."""
+        """Rewrite the log with only the conversations held in memory (compaction)."""
         try:
-            data = {
-                "max_conversations": self.max_conversations,
-                "last_updated": datetime.now().isoformat(),
-                "conversations": list(self.conversations)
-            }
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+            # Written aside and swapped in, so a crash never leaves the log
+            # half-written
+            temp_file = self.storage_file.with_name(self.storage_file.name + ".tmp")
+            # Copied first: a background flush may run while the deque changes
+            conversations = list(self.conversations)
+            temp_file.write_bytes(b"".join(_dump_json(conv) + b"\n" for conv in conversations))
+            os.replace(temp_file, self.storage_file)
 
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self._lines_on_disk = len(conversations)
+            self._pending.clear()
+            self._rewrite_needed = False
 
-            self.logger.debug(f"Saved {len(self.conversations)} conversations to {self.storage_file}")
+            logger.debug(f"Saved {len(conversations)} conversations to {self.storage_file}")
 
         except Exception as e:
-            self.logger.error(f"Failed to save conversations: {e}")
+            logger.error(f"Failed to save conversations: {e}")
 
     def load_from_disk(self) -> None:
-        """Load conversations from disk."""
-        if not self.storage_file.exists():
-            self.logger.debug("No existing conversation file found")
+        """
+        Load conversations from disk.
+
+        Files in the earlier single-document JSON format are read as well,
+        and rewritten as a log on the next save.
+        """
+        if self.storage_file.exists():
+            source = self.storage_file
+        elif self._legacy_file is not None and self._legacy_file.exists():
+            source = self._legacy_file
+        else:
+            logger.debug("No existing conversation file found")
             return
 
         try:
-            with open(self.storage_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            conversations = data.get("conversations", [])
+            raw = source.read_bytes()
+
+            if raw.split(b"\n", 1)[0].strip() == b"{":
+                # Indented JSON document from before the log format
+                conversations = _load_json(raw).get("conversations", [])
+                self._rewrite_needed = True
+            else:
+                conversations = []
+                lines = raw.splitlines()
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        conversations.append(_load_json(line))
+                    except ValueError:
+                        # A line cut short by a crash mid-append
+                        logger.warning(f"Skipping unreadable line in {source}")
+                        self._rewrite_needed = True
+                self._lines_on_disk = len(lines)
+                # An unterminated last line would swallow the next append
+                if raw and not raw.endswith(b"\n"):
+                    self._rewrite_needed = True
 
             # Load into deque (will automatically limit to max_conversations)
             self.conversations = deque(conversations, maxlen=self.max_conversations)
+            self._version += 1
 
-            self.logger.info(f"Loaded {len(self.conversations)} conversations from disk")
+            logger.info(f"Loaded {len(self.conversations)} conversations from disk")
 
         except Exception as e:
-            self.logger.error(f"Failed to load conversations: {e}")
+            logger.error(f"Failed to load conversations: {e}")
             self.conversations = deque(maxlen=self.max_conversations)
+            self._version += 1
+
+    def __len__(self) -> int:
+        """Return the number of conversations in memory."""
+        return len(self.conversations)
 
     def get_summary(self) -> Dict[str, Any]:
         """
@@ -249,25 +417,29 @@ class ConversationMemory:
         """
 
         keyword_lower = keyword.lower()
-        matches = []
-
-        for conv in self.conversations:
-            # Search in user input
-            if keyword_lower in conv["user_input"].lower():
-                matches.append(conv)
-                continue
-
-            # Search in command
-            if conv.get("generated_command") and keyword_lower in conv["generated_command"].lower():
-                matches.append(conv)
-                continue
 
-        return matches
+        # Lowercased user input and command per conversation, kept until the
+        # memory changes; the NUL separator stops a keyword matching across
+        # the two fields
+        if self._search_cache is None or self._search_cache[0] != self._version:
+            blobs = [
+                f"{conv['user_input']}\0{conv.get('generated_command') or ''}".lower()
+                for conv in self.conversations
+            ]
+            self._search_cache = (self._version, blobs)
+
+        return [
+            conv for conv, blob in zip(self.conversations, self._search_cache[1])
+            if keyword_lower in blob
+        ]
 
     def get_context_messages(self, include_last_n: int = 3) -> List[Dict[str, str]]:
         """
         Get conversation history formatted as OpenAI messages.
 
+        The result is cached until the memory changes, so callers must not
+        modify the returned list.
+
         Args:
             include_last_n: Number of recent conversations to include
 
@@ -275,10 +447,14 @@ class ConversationMemory:
             List of message dictionaries for OpenAI API
         """
 
-        if not self.conversations:
+        if not self.conversations or include_last_n <= 0:
             return []
 
-        recent_conversations = list(self.conversations)[-include_last_n:]
+        cache_key = (self._version, include_last_n)
+        if self._context_cache is not None and self._context_cache[0] == cache_key:
+            return self._context_cache[1]
+
+        recent_conversations = self._recent(include_last_n)
         messages = []
 
         for conv in recent_conversations:
@@ -310,6 +486,7 @@ class ConversationMemory:
                     "content": "\n".join(assistant_content)
                 })
 
+        self._context_cache = (cache_key, messages)
         return messages
 
     def has_recent_file_analysis(self, file_path: str, within_minutes: int = 30) -> bool:
@@ -326,17 +503,17 @@ class ConversationMemory:
 
         from datetime import timedelta
 
-        cutoff_time = datetime.now() - timedelta(minutes=within_minutes)
+        # Timestamps are local-time isoformat() strings, which sort in time
+        # order, so they are compared as strings instead of being parsed
+        cutoff = (datetime.now() - timedelta(minutes=within_minutes)).isoformat()
+        file_path_lower = file_path.lower()
 
         for conv in reversed(self.conversations):
-            # Parse timestamp
-            conv_time = datetime.fromisoformat(conv["timestamp"])
-
-            if conv_time < cutoff_time:
+            if conv["timestamp"] < cutoff:
                 break  # Too old
 
             # Check if this conversation involved the file
-            if file_path.lower() in conv["user_input"].lower():
+            if file_path_lower in conv["user_input"].lower():
                 return True
 
         return False
@@ -1,15 +1,55 @@
 """Logging configuration."""
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+
+# Log file size at which it is rotated, and rotated files kept
+_LOG_FILE_MAX_BYTES = 32 * 1024 * 1024
+_LOG_FILE_BACKUPS = 5
+
+# Arguments of the last setup_logging() call, and the thread writing the log
+# file; see setup_logging()
+_configured: Optional[Tuple[str, Optional[str]]] = None
+_file_listener: Optional[QueueListener] = None
+
+
+class _Formatter(logging.Formatter):
+    """Formatter that checks its format string for a timestamp once, not per record."""
+
+    def __init__(self, fmt: str):
+        super().__init__(fmt)
+        self._uses_time = super().usesTime()
+
+    def usesTime(self) -> bool:
+        return self._uses_time
+
+
+def _stop_file_listener() -> None:
+    """Drain queued records to the log file and stop its writer thread."""
+    global _file_listener
+    if _file_listener is not None:
+        _file_listener.stop()
+        for handler in _file_listener.handlers:
+            handler.close()
+        _file_listener = None
+
+
+atexit.register(_stop_file_listener)
 
 
 def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
     """
     Configure logging with both file and console handlers.
 
+    File records are handed to a background thread through a queue, so
+    logging calls never wait on disk writes. Calling again with the same
+    arguments leaves the configuration as it is.
+
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Optional path to log file
@@ -17,18 +57,27 @@ def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> loggin
     Returns:
         Configured logger instance
     """
+    global _configured, _file_listener
 
     # Create logger
     logger = logging.getLogger()
+
+    if _configured == (level, log_file):
+        return logger
+
     logger.setLevel(getattr(logging, level.upper()))
 
     # Remove existing handlers to avoid duplicates
+    _stop_file_listener()
+    for handler in logger.handlers:
+        handler.close()
     logger.handlers.clear()
 
-    # Console handler with color-friendly format
+    # Console handler with color-friendly format; it stays synchronous so log
+    # lines keep their order relative to the CLI's own output
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_format = logging.Formatter(
+    console_format = _Formatter(
         '[%(levelname)s] %(name)s: %(message)s'
     )
     console_handler.setFormatter(console_format)
@@ -37,12 +86,21 @@ def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> loggin
     # File handler if specified
     if log_file:
         Path(log_file).parent.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(log_file)
+        # Rotation checks the file size per record; that cost falls on the
+        # listener thread below, not on the logging call
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=_LOG_FILE_MAX_BYTES, backupCount=_LOG_FILE_BACKUPS, encoding='utf-8'
+        )
         file_handler.setLevel(logging.DEBUG)
-        file_format = logging.Formatter(
+        file_format = _Formatter(
             '%(asctime)s [%(levelname)s] %(name)s:%(lineno)d - %(message)s'
         )
         file_handler.setFormatter(file_format)
-        logger.addHandler(file_handler)
 
+        log_queue = queue.SimpleQueue()
+        _file_listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _file_listener.start()
+        logger.addHandler(QueueHandler(log_queue))
+
+    _configured = (level, log_file)
     return logger
@@ -0,0 +1,54 @@
+"""In-process LRU cache for LLM results."""
+
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import hashlib
+import time
+
+
+class ResultCache:
+    """
+    LRU cache for LLM results with an optional time-to-live.
+
+    Only successful results are stored: the tools raise on failure, so an
+    error never reaches put() and is never replayed from the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries kept
+            ttl: Seconds an entry stays valid, or None for no expiry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, value = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+def hash_key(*parts: Any) -> str:
+    """Hash the given parts into a compact cache key."""
+    raw = "\x00".join(str(part) for part in parts)
+    return hashlib.blake2b(raw.encode("utf-8", errors="replace"), digest_size=16).hexdigest()
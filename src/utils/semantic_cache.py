@@ -0,0 +1,70 @@
+"""In-process cache matching questions by embedding similarity."""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    """Dot product of two equal-length vectors."""
+    return sum(x * y for x, y in zip(a, b))
+
+
+class SemanticCache:
+    """
+    Cache of answers looked up by question meaning rather than exact text.
+
+    Entries are grouped by scope (e.g. a hash of the content being asked
+    about), so only paraphrases of a question about the same content can
+    match. Embeddings must be unit length, as OpenAI embeddings are, so the
+    dot product is the cosine similarity.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_scopes: int = 64, max_entries: int = 32):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_scopes: Scopes kept, least recently used evicted first
+            max_entries: Questions kept per scope, oldest evicted first
+        """
+        self.threshold = threshold
+        self.max_scopes = max_scopes
+        self.max_entries = max_entries
+        self._scopes: "OrderedDict[str, List[Tuple[Sequence[float], Dict[str, Any]]]]" = OrderedDict()
+
+    def lookup(self, scope: str, embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """
+        Return the value of the most similar cached question, if close enough.
+
+        Args:
+            scope: Scope key of the question
+            embedding: Unit-length embedding of the question
+
+        Returns:
+            Cached value, or None if no question in scope reaches the threshold
+        """
+        entries = self._scopes.get(scope)
+        if not entries:
+            return None
+
+        self._scopes.move_to_end(scope)
+        score, value = max(((_dot(embedding, vec), value) for vec, value in entries), key=lambda e: e[0])
+        return value if score >= self.threshold else None
+
+    def add(self, scope: str, embedding: Sequence[float], value: Dict[str, Any]) -> None:
+        """
+        Store a value for a question.
+
+        Args:
+            scope: Scope key of the question
+            embedding: Unit-length embedding of the question
+            value: Value to return for similar questions
+        """
+        entries = self._scopes.setdefault(scope, [])
+        self._scopes.move_to_end(scope)
+        entries.append((embedding, value))
+        if len(entries) > self.max_entries:
+            del entries[0]
+        if len(self._scopes) > self.max_scopes:
+            self._scopes.popitem(last=False)
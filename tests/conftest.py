@@ -0,0 +1,8 @@
+"""Shared pytest configuration."""
+
+import sys
+from pathlib import Path
+
+# Modules import each other as top-level packages (tools, utils, ...), as
+# when the CLI runs from src/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,52 @@
+"""Tests for the failure analyzer's canned corrections."""
+
+import asyncio
+
+import pytest
+
+from tools.failure_analyzer import FailureAnalyzer, _quick_fix_command_not_found
+
+
+def _not_recognized(term: str) -> str:
+    """Verbatim error PowerShell writes for an unknown command."""
+    return (
+        f"{term} : The term '{term}' is not recognized as the name of a cmdlet, function, "
+        "script file, or operable program. Check the spelling of the name, or if a path "
+        "was included, verify that the path is correct and try again."
+    )
+
+
+def test_quick_fix_for_full_not_recognized_message():
+    analyzer = FailureAnalyzer(api_key="test-key")
+
+    result = asyncio.run(analyzer.analyze_failure(
+        user_intent="find errors in a.txt",
+        failed_command="Get-Content a.txt | grep error",
+        error_output=_not_recognized("grep"),
+        return_code=1,
+    ))
+
+    assert result["root_cause"] == "command_not_found"
+    assert result["corrected_command"] == "Get-Content a.txt | Select-String -Pattern error"
+    assert result["should_retry"] is True
+
+
+@pytest.mark.parametrize("command, term, expected", [
+    ("Get-Content a.txt | grep error", "grep", "Get-Content a.txt | Select-String -Pattern error"),
+    ("which python", "which", "Get-Command python"),
+    ("Get-Content a.txt | head", "head", "Get-Content a.txt | Select-Object -First 10"),
+])
+def test_quick_fix_rewrites_supported_forms(command, term, expected):
+    assert _quick_fix_command_not_found(command, _not_recognized(term), "powershell") == expected
+
+
+@pytest.mark.parametrize("command, term", [
+    ("head README.md", "head"),
+    ("tail log.txt", "tail"),
+    ("wc file.txt", "wc"),
+    ("ls | grep", "grep"),
+    ("grep -i error a.txt", "grep"),
+    ("which -a python", "which"),
+])
+def test_quick_fix_leaves_other_forms_to_the_llm(command, term):
+    assert _quick_fix_command_not_found(command, _not_recognized(term), "powershell") is None
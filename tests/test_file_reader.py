@@ -0,0 +1,34 @@
+"""Tests for FileReader's encoding fallback."""
+
+import asyncio
+
+from tools.file_reader import FileReader
+
+_TEXT = "héllo wörld — ok"
+
+
+def _read(tmp_path, data: bytes):
+    path = tmp_path / "sample.txt"
+    path.write_bytes(data)
+    return asyncio.run(FileReader().read_file(str(path)))
+
+
+def test_utf8_with_stray_byte_stays_utf8(tmp_path):
+    result = _read(tmp_path, _TEXT.encode("utf-8") + b"\xff")
+
+    assert result["encoding"] == "utf-8"
+    assert result["content"] == _TEXT + "�"
+
+
+def test_utf8_bom_is_stripped(tmp_path):
+    result = _read(tmp_path, b"\xef\xbb\xbf" + _TEXT.encode("utf-8"))
+
+    assert result["encoding"] == "utf-8-sig"
+    assert result["content"] == _TEXT
+
+
+def test_cp1252_file_falls_back_to_cp1252(tmp_path):
+    result = _read(tmp_path, "café — ok".encode("cp1252"))
+
+    assert result["encoding"] == "cp1252"
+    assert result["content"] == "café — ok"
@@ -0,0 +1,25 @@
+"""Tests for analysis intent detection in the command generation node."""
+
+import pytest
+
+from graph.nodes import _WORD_RE, _classify_intent
+
+
+def _classify(user_input: str):
+    lower_input = user_input.lower()
+    return _classify_intent(lower_input, frozenset(_WORD_RE.findall(lower_input)))
+
+
+@pytest.mark.parametrize("user_input, expected", [
+    ("Analyze the cloned repo", (True, "general")),
+    ("Explain the downloaded script", (True, "explain")),
+    ("Summarize README.md after reading it", (True, "general")),
+    ("Read config.py and review its security", (True, "security")),
+    ("Read setup.py and explain what its purpose is", (True, "purpose")),
+])
+def test_classify_intent(user_input, expected):
+    assert _classify(user_input) == expected
+
+
+def test_plain_commands_need_no_analysis():
+    assert _classify("List the running processes") == (False, None)